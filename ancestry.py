@@ -0,0 +1,272 @@
+from collections import defaultdict, deque
+from psycopg2.extras import execute_values
+
+
+def closure_rows(connections):
+    """Yield (ancestor_id, descendant_id, depth) for every ancestor of every person.
+
+    Built from Parent-Child connections in topological order, so each person's
+    ancestors are derived from their parents' already-finished sets. Depth is the
+    shortest number of generations when a tree has pedigree collapse. A parent's
+    set is dropped once all of its children have been processed.
+    """
+    parents = defaultdict(set)
+    children = defaultdict(set)
+    for conn in connections:
+        if conn['type'] == 'Parent-Child':
+            parents[conn['to_node_id']].add(conn['from_node_id'])
+            children[conn['from_node_id']].add(conn['to_node_id'])
+
+    people = set(parents) | set(children)
+    pending_parents = {person: len(parents[person]) for person in people}
+    pending_children = {person: len(children[person]) for person in people}
+    queue = deque(person for person, count in pending_parents.items() if count == 0)
+    ancestors = {}
+    processed = 0
+
+    while queue:
+        person = queue.popleft()
+        own = {person: 0}
+        for parent in parents[person]:
+            for ancestor, depth in ancestors[parent].items():
+                if depth + 1 < own.get(ancestor, depth + 2):
+                    own[ancestor] = depth + 1
+            pending_children[parent] -= 1
+            if pending_children[parent] == 0:
+                del ancestors[parent]
+
+        for ancestor, depth in own.items():
+            yield ancestor, person, depth
+        processed += 1
+
+        if pending_children[person]:
+            ancestors[person] = own
+        for child in children[person]:
+            pending_parents[child] -= 1
+            if pending_parents[child] == 0:
+                queue.append(child)
+
+    if processed < len(people):
+        print(f"Skipped {len(people) - processed} people caught in Parent-Child cycles")
+
+
+def generation_depths(connections):
+    """Return person -> generation, counted from the topmost ancestor (0) down the longest line."""
+    parents = defaultdict(set)
+    children = defaultdict(set)
+    for conn in connections:
+        if conn['type'] == 'Parent-Child':
+            parents[conn['to_node_id']].add(conn['from_node_id'])
+            children[conn['from_node_id']].add(conn['to_node_id'])
+
+    people = set(parents) | set(children)
+    pending_parents = {person: len(parents[person]) for person in people}
+    queue = deque(person for person, count in pending_parents.items() if count == 0)
+    generations = {}
+
+    while queue:
+        person = queue.popleft()
+        generations[person] = max((generations[parent] + 1 for parent in parents[person]), default=0)
+        for child in children[person]:
+            pending_parents[child] -= 1
+            if pending_parents[child] == 0:
+                queue.append(child)
+    return generations
+
+
+def annotate_generations(nodes, connections):
+    """Set 'generation' on each parsed node; people outside any parent-child line get 0."""
+    generations = generation_depths(connections)
+    for node in nodes:
+        node['generation'] = generations.get(node['id'], 0)
+    return nodes
+
+
+def rebuild_ancestry(db, dataset_id, connections):
+    """Replace the ancestry closure of a dataset with one built from connections."""
+    with db.get_cursor() as cur:
+        cur.execute("DELETE FROM Ancestry WHERE dataset_id = %s", (dataset_id,))
+        execute_values(
+            cur,
+            "INSERT INTO Ancestry (dataset_id, ancestor_id, descendant_id, depth) VALUES %s",
+            ((dataset_id, ancestor, descendant, depth)
+             for ancestor, descendant, depth in closure_rows(connections)),
+            page_size=5000
+        )
+        cur.execute("SELECT COUNT(*) FROM Ancestry WHERE dataset_id = %s", (dataset_id,))
+        count = cur.fetchone()['count']
+    print(f"Built ancestry closure for dataset {dataset_id}: {count} rows")
+    return count
+
+
+def add_parent_edges(cur, dataset_id, edges):
+    """Extend the ancestry closure with new (parent_id, child_id) edges inside the caller's transaction.
+
+    Every ancestor of the parent (and the parent itself) becomes an ancestor of
+    every descendant of the child (and the child itself), keeping the shortest
+    depth. The edges are staged in a temp table and edges already in the closure
+    are dropped with one anti-join, so a batch costs a few set-based statements.
+    When new edges chain onto each other the merge is repeated until nothing
+    changes. Apply removals first with remove_parent_edges.
+    """
+    edges = list(edges)
+    if not edges:
+        return 0
+
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS new_parent_edges (
+            parent_id VARCHAR(255) NOT NULL,
+            child_id VARCHAR(255) NOT NULL
+        ) ON COMMIT DROP
+    """)
+    cur.execute("TRUNCATE new_parent_edges")
+    execute_values(cur, "INSERT INTO new_parent_edges (parent_id, child_id) VALUES %s", edges, page_size=5000)
+    # Everyone on an edge has a row for themselves, even if the edge is already merged
+    cur.execute("""
+        INSERT INTO Ancestry (dataset_id, ancestor_id, descendant_id, depth)
+        SELECT %s, person, person, 0
+        FROM (SELECT parent_id AS person FROM new_parent_edges UNION SELECT child_id FROM new_parent_edges) people
+        ON CONFLICT (dataset_id, ancestor_id, descendant_id) DO NOTHING
+    """, (dataset_id,))
+    cur.execute("""
+        DELETE FROM new_parent_edges e
+        WHERE EXISTS (
+            SELECT 1 FROM Ancestry x
+            WHERE x.dataset_id = %s AND x.ancestor_id = e.parent_id AND x.descendant_id = e.child_id AND x.depth = 1
+        )
+    """, (dataset_id,))
+    cur.execute("SELECT COUNT(DISTINCT (parent_id, child_id)) AS count FROM new_parent_edges")
+    added = cur.fetchone()['count']
+    if not added:
+        return 0
+    cur.execute("ANALYZE new_parent_edges")
+
+    merge = """
+        INSERT INTO Ancestry (dataset_id, ancestor_id, descendant_id, depth)
+        SELECT %(dataset)s, a.ancestor_id, d.descendant_id, MIN(a.depth + d.depth + 1)
+        FROM new_parent_edges e
+        JOIN Ancestry a ON a.dataset_id = %(dataset)s AND a.descendant_id = e.parent_id
+        JOIN Ancestry d ON d.dataset_id = %(dataset)s AND d.ancestor_id = e.child_id
+        GROUP BY a.ancestor_id, d.descendant_id
+        ON CONFLICT (dataset_id, ancestor_id, descendant_id)
+        DO UPDATE SET depth = EXCLUDED.depth WHERE EXCLUDED.depth < Ancestry.depth
+    """
+    cur.execute(merge, {'dataset': dataset_id})
+
+    # One pass is exact unless a new edge sits below another new edge's child
+    cur.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM new_parent_edges e1
+            JOIN Ancestry x ON x.dataset_id = %s AND x.ancestor_id = e1.child_id
+            JOIN new_parent_edges e2 ON e2.parent_id = x.descendant_id
+        ) AS chained
+    """, (dataset_id,))
+    if cur.fetchone()['chained']:
+        while True:
+            cur.execute(merge, {'dataset': dataset_id})
+            if not cur.rowcount:
+                break
+    return added
+
+
+def remove_parent_edges(cur, dataset_id, edges):
+    """Recompute the closure below removed (parent_id, child_id) edges inside the caller's transaction.
+
+    Connections must already reflect the removal. Only people at or below a
+    removed edge's child can lose ancestors, so their rows are rebuilt from
+    their current parents; everyone above keeps their rows, which is what makes
+    the parents' ancestor sets reusable.
+    """
+    children = sorted({child for _, child in edges})
+    if not children:
+        return 0
+
+    cur.execute("""
+        SELECT DISTINCT descendant_id FROM Ancestry WHERE dataset_id = %s AND ancestor_id = ANY(%s)
+    """, (dataset_id, children))
+    affected = {row['descendant_id'] for row in cur.fetchall()} | set(children)
+
+    cur.execute("""
+        SELECT from_node_id, to_node_id FROM Connections
+        WHERE dataset_id = %s AND type = 'Parent-Child' AND to_node_id = ANY(%s)
+    """, (dataset_id, list(affected)))
+    parents = defaultdict(set)
+    children_of = defaultdict(set)
+    for row in cur.fetchall():
+        parents[row['to_node_id']].add(row['from_node_id'])
+        children_of[row['from_node_id']].add(row['to_node_id'])
+
+    outside = {parent for person in affected for parent in parents[person] if parent not in affected}
+    ancestors = {parent: {parent: 0} for parent in outside}
+    if outside:
+        cur.execute("""
+            SELECT ancestor_id, descendant_id, depth FROM Ancestry
+            WHERE dataset_id = %s AND descendant_id = ANY(%s)
+        """, (dataset_id, list(outside)))
+        for row in cur.fetchall():
+            ancestors[row['descendant_id']][row['ancestor_id']] = row['depth']
+
+    # Same walk as closure_rows, restricted to the affected people
+    pending_parents = {person: sum(1 for parent in parents[person] if parent in affected) for person in affected}
+    queue = deque(person for person, count in pending_parents.items() if count == 0)
+    rows = []
+    while queue:
+        person = queue.popleft()
+        own = {person: 0}
+        for parent in parents[person]:
+            for ancestor, depth in ancestors[parent].items():
+                if depth + 1 < own.get(ancestor, depth + 2):
+                    own[ancestor] = depth + 1
+        ancestors[person] = own
+        # People no longer in any Parent-Child connection get no rows, as in closure_rows
+        if parents[person] or children_of[person]:
+            rows.extend((dataset_id, ancestor, person, depth) for ancestor, depth in own.items())
+        for child in children_of[person]:
+            if child in affected:
+                pending_parents[child] -= 1
+                if pending_parents[child] == 0:
+                    queue.append(child)
+
+    cur.execute("""
+        DELETE FROM Ancestry WHERE dataset_id = %s AND descendant_id = ANY(%s)
+    """, (dataset_id, list(affected)))
+    execute_values(cur, "INSERT INTO Ancestry (dataset_id, ancestor_id, descendant_id, depth) VALUES %s",
+                   rows, page_size=5000)
+
+    # A parent left without any Parent-Child connection only has its own row to drop
+    cur.execute("""
+        DELETE FROM Ancestry a
+        WHERE a.dataset_id = %s AND a.ancestor_id = ANY(%s) AND a.descendant_id = a.ancestor_id
+        AND NOT EXISTS (
+            SELECT 1 FROM Connections c
+            WHERE c.dataset_id = a.dataset_id AND c.type = 'Parent-Child'
+            AND (c.from_node_id = a.ancestor_id OR c.to_node_id = a.ancestor_id)
+        )
+    """, (dataset_id, sorted({parent for parent, _ in edges} - affected)))
+    return len(affected)
+
+
+def parent_edges(connections):
+    """Return the (parent_id, child_id) pairs of the Parent-Child connections."""
+    return [(conn['from_node_id'], conn['to_node_id'])
+            for conn in connections if conn['type'] == 'Parent-Child']
+
+
+def describe_relationship(generations_a, generations_b):
+    """Name the kinship of A to B given each one's distance to their nearest common ancestor."""
+    if generations_a == 0 and generations_b == 0:
+        return 'self'
+    if generations_a == 0:
+        return 'parent' if generations_b == 1 else f"ancestor ({generations_b} generations)"
+    if generations_b == 0:
+        return 'child' if generations_a == 1 else f"descendant ({generations_a} generations)"
+    if generations_a == 1 and generations_b == 1:
+        return 'sibling'
+    degree = min(generations_a, generations_b) - 1
+    removed = abs(generations_a - generations_b)
+    if degree == 0:
+        # One generation apart is an aunt/uncle; each further generation adds a great-
+        prefix = 'great-' * (removed - 1)
+        return f"{prefix}aunt/uncle" if generations_a < generations_b else f"{prefix}niece/nephew"
+    name = f"cousin (degree {degree})"
+    return f"{name}, {removed} times removed" if removed else name
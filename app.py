@@ -2,37 +2,83 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
-from flask import Flask, jsonify, request, render_template, send_file
+import threading
+import time
+from flask import Blueprint, Flask, current_app, jsonify, request, render_template, send_file, session
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from database import Database
+from database import Database, MIN_YEAR, MAX_YEAR
 from math import ceil
 from config import Config
-import psycopg2
-import json
-import tempfile
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from ged_parser import GEDParser
+
+# GEDCOM parsing, ancestry, reconciliation and export modules are imported
+# inside the views that use them, so workers boot without paying for them.
 
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'ged'}
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = Config.SECRET_KEY
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+bp = Blueprint('main', __name__)
 db = Database.get_instance()
 
 limiter = Limiter(
     get_remote_address,
-    app=app,
     default_limits=["200 per minute"]
 )
 
+warm_up_lock = threading.Lock()
+
+WARM_UP_MAX_BACKOFF = 30
+
+def warm_up_database():
+    # Keep retrying with backoff so a worker that booted before PostgreSQL was
+    # reachable still becomes ready once it is
+    delay = 1
+    while True:
+        try:
+            db.warm_up()
+            return
+        except Exception as e:
+            print(f"Database warm-up failed, retrying in {delay}s: {str(e)}")
+            time.sleep(delay)
+            delay = min(delay * 2, WARM_UP_MAX_BACKOFF)
+
+def ensure_warm_up():
+    # Runs once per process; a worker forked from a preloaded app starts its
+    # own warm-up on its first request (typically the readiness probe)
+    with warm_up_lock:
+        if db.warm_up_pid == os.getpid():
+            return
+        db.warm_up_pid = os.getpid()
+    threading.Thread(target=warm_up_database, name='db-warm-up', daemon=True).start()
+
+_fork_hook_registered = False
+
+def create_app(warm_up=True):
+    global _fork_hook_registered
+
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = Config.SECRET_KEY
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['RATELIMIT_ENABLED'] = Config.RATELIMIT_ENABLED
+    limiter.init_app(app)
+    app.register_blueprint(bp)
+
+    # Connections must never be shared across a fork, so children drop the
+    # inherited ones instead of reusing the parent's sockets
+    if not _fork_hook_registered and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=db.reset_after_fork)
+        _fork_hook_registered = True
+
+    if warm_up:
+        ensure_warm_up()
+    return app
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-@app.route('/api/create_default_dataset', methods=['POST'])
+@bp.route('/api/create_default_dataset', methods=['POST'])
 def create_default_dataset():
     try:
         existing_default = db.execute_query("SELECT id FROM Datasets WHERE name = 'Default Dataset' LIMIT 1")
@@ -89,15 +135,25 @@ def create_default_dataset():
         traceback.print_exc()
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
-@app.before_request
+@bp.before_app_request
 def before_request():
-    pass
-
-@app.route('/')
+    ensure_warm_up()
+    # The client's last write time travels in its signed session cookie, so
+    # every worker keeps its reads on the primary right after it writes
+    if db.replicas:
+        db.begin_request(session.get('db_last_write'))
+
+@bp.after_app_request
+def after_request(response):
+    if db.replicas and db.request_wrote():
+        session['db_last_write'] = db.local.last_write
+    return response
+
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/api/most_recent_dataset')
+@bp.route('/api/most_recent_dataset')
 def get_most_recent_dataset():
     try:
         dataset = db.execute_query("SELECT id FROM Datasets ORDER BY id DESC LIMIT 1")
@@ -113,7 +169,7 @@ def get_most_recent_dataset():
         print(f"Error fetching most recent dataset: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/nodes')
+@bp.route('/api/nodes')
 def get_nodes():
     try:
         dataset_id = request.args.get('dataset_id')
@@ -126,24 +182,23 @@ def get_nodes():
         y = float(request.args.get('y', 0))
         z = float(request.args.get('z', 0))
         radius = float(request.args.get('radius', 1000))
+        year_from = request.args.get('year_from')
+        year_to = request.args.get('year_to')
 
         offset = (page - 1) * per_page
 
-        query = """
-        SELECT * FROM Nodes
-        WHERE dataset_id = %s AND POWER(x - %s, 2) + POWER(y - %s, 2) + POWER(z - %s, 2) <= POWER(%s, 2)
-        LIMIT %s OFFSET %s
-        """
-        nodes = db.execute_query(query, (dataset_id, x, y, z, radius, per_page, offset))
+        # Optional birth-year window, served from the (dataset_id, birth_year) index
+        shape, filters = 'nodes_in_radius', (dataset_id,)
+        if year_from or year_to:
+            shape = 'nodes_in_radius_between_years'
+            filters = (dataset_id, int(year_from) if year_from else MIN_YEAR, int(year_to) if year_to else MAX_YEAR)
+
+        nodes = db.execute_named(shape, (*filters, x, y, z, radius, per_page, offset))
 
         if not nodes:
             return jsonify({'nodes': [], 'page': page, 'per_page': per_page, 'total_pages': 0, 'total_count': 0})
 
-        count_query = """
-        SELECT COUNT(*) FROM Nodes
-        WHERE dataset_id = %s AND POWER(x - %s, 2) + POWER(y - %s, 2) + POWER(z - %s, 2) <= POWER(%s, 2)
-        """
-        count_result = db.execute_query(count_query, (dataset_id, x, y, z, radius))
+        count_result = db.execute_named(f"count_{shape}", (*filters, x, y, z, radius))
 
         total_count = count_result[0]['count']
         total_pages = ceil(total_count / per_page)
@@ -159,7 +214,7 @@ def get_nodes():
         print(f"Error in get_nodes: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/update_node', methods=['POST'])
+@bp.route('/api/update_node', methods=['POST'])
 def update_node():
     try:
         data = request.json
@@ -185,7 +240,7 @@ def update_node():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/connections')
+@bp.route('/api/connections')
 @limiter.limit("100/minute")
 def get_connections():
     try:
@@ -210,18 +265,9 @@ def get_connections():
 
         offset = (page - 1) * per_page
 
-        query = """
-        SELECT * FROM Connections
-        WHERE dataset_id = %s AND (from_node_id = ANY(%s) OR to_node_id = ANY(%s))
-        LIMIT %s OFFSET %s
-        """
-        connections = db.execute_query(query, (dataset_id, node_ids, node_ids, per_page, offset))
+        connections = db.execute_named('connections_for_nodes', (dataset_id, node_ids, node_ids, per_page, offset))
 
-        count_query = """
-        SELECT COUNT(*) FROM Connections
-        WHERE dataset_id = %s AND (from_node_id = ANY(%s) OR to_node_id = ANY(%s))
-        """
-        count_result = db.execute_query(count_query, (dataset_id, node_ids, node_ids))
+        count_result = db.execute_named('count_connections_for_nodes', (dataset_id, node_ids, node_ids))
 
         total_count = count_result[0]['count']
         total_pages = ceil(total_count / per_page)
@@ -237,11 +283,14 @@ def get_connections():
         print(f"Error in get_connections: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/save_data', methods=['POST'])
+@bp.route('/api/save_data', methods=['POST'])
 def save_data():
     try:
         data = request.json
         
+        import json
+        import tempfile
+
         # Save data to a temporary file
         with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as temp_file:
             json.dump(data, temp_file, indent=2)
@@ -252,7 +301,7 @@ def save_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/load_data', methods=['POST'])
+@bp.route('/api/load_data', methods=['POST'])
 def load_data():
     try:
         data = request.json
@@ -278,20 +327,23 @@ def load_data():
         for conn in data['connections']:
             query = """
             INSERT INTO Connections (id, from_node_id, to_node_id, type, dataset_id, strength, confidence) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            VALUES (COALESCE(%s, nextval(pg_get_serial_sequence('connections', 'id'))), %s, %s, %s, %s, %s, %s)
             """
             db.execute_query(query, (
-                conn['id'], conn['from_node_id'], conn['to_node_id'], 
+                conn.get('id'), conn['from_node_id'], conn['to_node_id'], 
                 conn['type'], dataset_id,
                 conn.get('strength'),
                 conn.get('confidence')
             ))
 
+        from ancestry import rebuild_ancestry
+        rebuild_ancestry(db, dataset_id, data['connections'])
+
         return jsonify({'message': 'Data loaded successfully', 'dataset_id': dataset_id, 'dataset_name': dataset_name}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/sync_data', methods=['POST'])
+@bp.route('/api/sync_data', methods=['POST'])
 def sync_data():
     try:
         data = request.json
@@ -310,20 +362,27 @@ def sync_data():
                 """, node)
 
             # Sync connections
+            created = []
             for conn in data['connections']:
                 cur.execute("""
                     INSERT INTO Connections (from_node_id, to_node_id, type, dataset_id)
                     VALUES (%(from_node_id)s, %(to_node_id)s, %(type)s, %(dataset_id)s)
                     ON CONFLICT (id) DO UPDATE
                     SET from_node_id = EXCLUDED.from_node_id, to_node_id = EXCLUDED.to_node_id, type = EXCLUDED.type
+                    RETURNING from_node_id, to_node_id, type
                 """, conn)
+                created.extend(cur.fetchall())
+
+            # Sync only adds connections, so the ancestry closure can be extended in place
+            from ancestry import add_parent_edges, parent_edges
+            add_parent_edges(cur, dataset_id, parent_edges(created))
 
         return jsonify({'message': 'Data synchronized successfully'}), 200
     except Exception as e:
         print(f"Error in sync_data: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/datasets', methods=['GET'])
+@bp.route('/api/datasets', methods=['GET'])
 def get_datasets():
     try:
         datasets = db.execute_query("SELECT id, name FROM Datasets")
@@ -332,14 +391,26 @@ def get_datasets():
         print(f"Error fetching datasets: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/dataset/<int:dataset_id>', methods=['GET'])
+@bp.route('/api/dataset/<int:dataset_id>', methods=['GET'])
 def get_dataset(dataset_id):
-    nodes = db.execute_query("SELECT * FROM Nodes WHERE dataset_id = %s", (dataset_id,))
-    connections = db.execute_query("SELECT * FROM Connections WHERE dataset_id = %s", (dataset_id,))
+    nodes = db.execute_named('dataset_nodes', (dataset_id,))
+    connections = db.execute_named('dataset_connections', (dataset_id,))
     print(f"Retrieved dataset {dataset_id}: {len(nodes)} nodes and {len(connections)} connections")
     return jsonify({'nodes': nodes, 'connections': connections})
 
-@app.route('/api/dataset', methods=['POST'])
+@bp.route('/api/dataset/<int:dataset_id>/sample', methods=['GET'])
+def get_dataset_sample(dataset_id):
+    try:
+        from sampling import sample_dataset, DEFAULT_SAMPLE_SIZE, DEFAULT_GRID
+
+        size = int(request.args.get('n', DEFAULT_SAMPLE_SIZE))
+        grid = int(request.args.get('grid', DEFAULT_GRID))
+        return jsonify(sample_dataset(db, dataset_id, size, grid))
+    except Exception as e:
+        print(f"Error sampling dataset: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/dataset', methods=['POST'])
 def create_dataset():
     data = request.json
     dataset_name = data['name']
@@ -362,13 +433,17 @@ def create_dataset():
             INSERT INTO Connections (id, from_node_id, to_node_id, type, dataset_id) 
             VALUES (%s, %s, %s, %s, %s)
         """, (conn['id'], conn['from_node_id'], conn['to_node_id'], conn['type'], dataset_id))
-    
+
+    from ancestry import rebuild_ancestry
+    rebuild_ancestry(db, dataset_id, connections)
+
     return jsonify({'message': 'Dataset created successfully', 'dataset_id': dataset_id})
 
-@app.route('/api/dataset/<int:dataset_id>', methods=['DELETE'])
+@bp.route('/api/dataset/<int:dataset_id>', methods=['DELETE'])
 def delete_dataset(dataset_id):
     try:
-        # First, delete all connections associated with this dataset
+        # First, delete the derived ancestry rows and all connections associated with this dataset
+        db.execute_query("DELETE FROM Ancestry WHERE dataset_id = %s", (dataset_id,))
         db.execute_query("DELETE FROM Connections WHERE dataset_id = %s", (dataset_id,))
         
         # Then, delete all nodes associated with this dataset
@@ -382,7 +457,7 @@ def delete_dataset(dataset_id):
         print(f"Error deleting dataset: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/upload_ged', methods=['POST'])
+@bp.route('/api/upload_ged', methods=['POST'])
 def upload_ged():
     try:
         if 'file' not in request.files:
@@ -392,11 +467,15 @@ def upload_ged():
             return jsonify({'error': 'No selected file'}), 400
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
             file.save(file_path)
             
+            from ged_parser import GEDParser
+            from ancestry import annotate_generations, rebuild_ancestry
+
             parser = GEDParser()
-            data = parser.parse_file(file_path)
+            data = parser.parse_file_parallel(file_path, workers=Config.GED_PARSE_WORKERS)
+            annotate_generations(data['nodes'], data['connections'])
             
             print(f"Parsed data: {data}")
             
@@ -407,8 +486,10 @@ def upload_ged():
             nodes = []
             for node in data['nodes']:
                 db.execute_query(
-                    "INSERT INTO Nodes (id, name, type, sex, dataset_id, x, y, z) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-                    (node['id'], node['name'], node['type'], node.get('sex', 'U'), dataset_id, 0, 0, 0)
+                    """INSERT INTO Nodes (id, name, type, sex, dataset_id, x, y, z, birth_year, death_year, generation)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                    (node['id'], node['name'], node['type'], node.get('sex', 'U'), dataset_id, 0, 0, 0,
+                     node.get('birthYear'), node.get('deathYear'), node.get('generation'))
                 )
                 nodes.append(node)
             
@@ -421,6 +502,8 @@ def upload_ged():
                 connections.append(conn)
             
             print(f"Inserted {len(nodes)} nodes and {len(connections)} connections")
+
+            rebuild_ancestry(db, dataset_id, data['connections'])
             
             return jsonify({
                 'message': 'File uploaded and processed successfully',
@@ -434,15 +517,240 @@ def upload_ged():
         print(f"Error in upload_ged: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/connection_ids', methods=['GET'])
-def get_connection_ids():
+def apply_ged_diff(dataset_id, data):
+    """Apply a parsed GEDCOM file to an existing dataset, touching only what changed.
+
+    Individuals are matched on their GEDCOM xref id and connections on
+    (from_node_id, to_node_id, type). The incoming rows are staged in temp tables
+    and diffed against the dataset with set-based updates and anti-joins, so
+    coordinates of surviving nodes are kept. The ancestry closure is updated for
+    the removed and added Parent-Child edges in the same transaction.
+    """
+    from psycopg2.extras import execute_values
+    from ancestry import add_parent_edges, parent_edges, remove_parent_edges
+
+    with db.get_cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE ged_nodes (
+                id VARCHAR(255) PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                type VARCHAR(50) NOT NULL,
+                sex CHAR(1) NOT NULL,
+                birth_year INTEGER,
+                death_year INTEGER,
+                generation INTEGER
+            ) ON COMMIT DROP
+        """)
+        cur.execute("""
+            CREATE TEMP TABLE ged_connections (
+                from_node_id VARCHAR(255) NOT NULL,
+                to_node_id VARCHAR(255) NOT NULL,
+                type VARCHAR(50) NOT NULL
+            ) ON COMMIT DROP
+        """)
+        execute_values(cur, "INSERT INTO ged_nodes (id, name, type, sex, birth_year, death_year, generation) VALUES %s",
+                       [(node['id'], node['name'], node['type'], node.get('sex', 'U'),
+                         node.get('birthYear'), node.get('deathYear'), node.get('generation'))
+                        for node in data['nodes']])
+        execute_values(cur, "INSERT INTO ged_connections (from_node_id, to_node_id, type) VALUES %s",
+                       [(conn['from_node_id'], conn['to_node_id'], conn['type']) for conn in data['connections']])
+        cur.execute("ANALYZE ged_nodes")
+        cur.execute("ANALYZE ged_connections")
+
+        # Connections go first so removed nodes are no longer referenced
+        cur.execute("""
+            DELETE FROM Connections c
+            WHERE c.dataset_id = %s AND NOT EXISTS (
+                SELECT 1 FROM ged_connections g
+                WHERE g.from_node_id = c.from_node_id AND g.to_node_id = c.to_node_id AND g.type = c.type
+            )
+            RETURNING c.from_node_id, c.to_node_id, c.type
+        """, (dataset_id,))
+        deleted = cur.fetchall()
+        connections_deleted = len(deleted)
+
+        cur.execute("""
+            DELETE FROM Nodes n
+            WHERE n.dataset_id = %s AND NOT EXISTS (SELECT 1 FROM ged_nodes g WHERE g.id = n.id)
+        """, (dataset_id,))
+        nodes_deleted = cur.rowcount
+
+        cur.execute("""
+            UPDATE Nodes n
+            SET name = g.name, type = g.type, sex = g.sex,
+                birth_year = g.birth_year, death_year = g.death_year, generation = g.generation
+            FROM ged_nodes g
+            WHERE n.dataset_id = %s AND n.id = g.id
+            AND (n.name, n.type, n.sex, n.birth_year, n.death_year, n.generation)
+                IS DISTINCT FROM (g.name, g.type, g.sex, g.birth_year, g.death_year, g.generation)
+        """, (dataset_id,))
+        nodes_updated = cur.rowcount
+
+        cur.execute("""
+            INSERT INTO Nodes (id, name, type, sex, dataset_id, x, y, z, birth_year, death_year, generation)
+            SELECT g.id, g.name, g.type, g.sex, %s, 0, 0, 0, g.birth_year, g.death_year, g.generation
+            FROM ged_nodes g
+            WHERE NOT EXISTS (SELECT 1 FROM Nodes n WHERE n.dataset_id = %s AND n.id = g.id)
+        """, (dataset_id, dataset_id))
+        nodes_inserted = cur.rowcount
+
+        cur.execute("""
+            INSERT INTO Connections (from_node_id, to_node_id, type, dataset_id)
+            SELECT DISTINCT g.from_node_id, g.to_node_id, g.type, %s::integer
+            FROM ged_connections g
+            WHERE NOT EXISTS (
+                SELECT 1 FROM Connections c
+                WHERE c.dataset_id = %s AND c.from_node_id = g.from_node_id
+                AND c.to_node_id = g.to_node_id AND c.type = g.type
+            )
+            RETURNING from_node_id, to_node_id, type
+        """, (dataset_id, dataset_id))
+        inserted = cur.fetchall()
+        connections_inserted = len(inserted)
+
+        recomputed = remove_parent_edges(cur, dataset_id, parent_edges(deleted))
+        added = add_parent_edges(cur, dataset_id, parent_edges(inserted))
+        ancestry = 'updated' if recomputed or added else 'unchanged'
+
+    return {
+        'nodes': {'inserted': nodes_inserted, 'updated': nodes_updated, 'deleted': nodes_deleted},
+        'connections': {'inserted': connections_inserted, 'deleted': connections_deleted},
+        'ancestry': ancestry
+    }
+
+@bp.route('/api/dataset/<int:dataset_id>/reimport_ged', methods=['POST'])
+def reimport_ged(dataset_id):
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file part'}), 400
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'File type not allowed'}), 400
+
+        if not db.execute_query("SELECT id FROM Datasets WHERE id = %s", (dataset_id,)):
+            return jsonify({'error': 'Dataset not found'}), 404
+
+        filename = secure_filename(file.filename)
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        file.save(file_path)
+
+        from ged_parser import GEDParser
+        from ancestry import annotate_generations
+
+        parser = GEDParser()
+        data = parser.parse_file_parallel(file_path, workers=Config.GED_PARSE_WORKERS)
+        annotate_generations(data['nodes'], data['connections'])
+
+        changes = apply_ged_diff(dataset_id, data)
+        print(f"Re-imported {filename} into dataset {dataset_id}: {changes}")
+
+        return jsonify({
+            'message': 'File re-imported successfully',
+            'dataset_id': dataset_id,
+            'changes': changes
+        })
+    except Exception as e:
+        print(f"Error in reimport_ged: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/dataset/<int:dataset_id>/ancestry/is_descendant', methods=['GET'])
+def is_descendant(dataset_id):
+    try:
+        descendant = request.args.get('descendant')
+        ancestor = request.args.get('ancestor')
+        if not descendant or not ancestor:
+            return jsonify({'error': 'Both descendant and ancestor must be provided'}), 400
+
+        rows = db.execute_named('ancestry_depth', (dataset_id, ancestor, descendant))
+        depth = rows[0]['depth'] if rows else (0 if ancestor == descendant else None)
+        return jsonify({
+            'descendant': descendant,
+            'ancestor': ancestor,
+            'is_descendant': depth is not None and depth > 0,
+            'generations': depth
+        })
+    except Exception as e:
+        print(f"Error in is_descendant: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/dataset/<int:dataset_id>/ancestry/common_ancestors', methods=['GET'])
+def get_common_ancestors(dataset_id):
+    try:
+        a = request.args.get('a')
+        b = request.args.get('b')
+        if not a or not b:
+            return jsonify({'error': 'Both a and b must be provided'}), 400
+        limit = int(request.args.get('limit', 10))
+
+        ancestors = db.execute_named('nearest_common_ancestors', (dataset_id, a, b, limit))
+        return jsonify({'a': a, 'b': b, 'common_ancestors': ancestors})
+    except Exception as e:
+        print(f"Error in get_common_ancestors: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/dataset/<int:dataset_id>/ancestry/relationship', methods=['GET'])
+def get_relationship(dataset_id):
+    try:
+        a = request.args.get('a')
+        b = request.args.get('b')
+        if not a or not b:
+            return jsonify({'error': 'Both a and b must be provided'}), 400
+
+        nearest = db.execute_named('nearest_common_ancestors', (dataset_id, a, b, 1))
+        if not nearest:
+            return jsonify({'a': a, 'b': b, 'related': False})
+
+        from ancestry import describe_relationship
+
+        nearest = nearest[0]
+        return jsonify({
+            'a': a,
+            'b': b,
+            'related': True,
+            'common_ancestor': nearest['ancestor_id'],
+            'generations_a': nearest['generations_a'],
+            'generations_b': nearest['generations_b'],
+            'degree': nearest['generations_a'] + nearest['generations_b'],
+            'relationship': describe_relationship(nearest['generations_a'], nearest['generations_b'])
+        })
+    except Exception as e:
+        print(f"Error in get_relationship: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/ready', methods=['GET'])
+@limiter.exempt
+def ready():
+    if db.ready:
+        return jsonify({'status': 'ready'}), 200
+    return jsonify({'status': 'warming'}), 503
+
+@bp.route('/api/query_stats', methods=['GET'])
+def get_query_stats():
+    return jsonify(db.get_query_stats())
+
+@bp.route('/api/dataset/<int:dataset_id>/reconcile', methods=['POST'])
+def reconcile_dataset(dataset_id):
+    try:
+        from reconciliation import reconcile
+        return jsonify(reconcile(db, dataset_id, request.json or {}))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error reconciling dataset: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/dataset/<int:dataset_id>/rows', methods=['POST'])
+def dataset_rows(dataset_id):
     try:
-        db = Database.get_instance()
-        connection_ids = db.execute_query("SELECT id FROM Connections")
-        return jsonify([conn['id'] for conn in connection_ids])
+        from reconciliation import fetch_rows
+        return jsonify(fetch_rows(db, dataset_id, request.json or {}))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error fetching connection IDs: {str(e)}")
+        print(f"Error fetching dataset rows: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
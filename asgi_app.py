@@ -0,0 +1,127 @@
+"""Async (ASGI) serving mode for the read-heavy endpoints.
+
+Run alongside or instead of the Flask app, e.g.:
+
+    hypercorn asgi_app:app --bind 0.0.0.0:5001
+
+Write endpoints and GEDCOM imports stay on the Flask app (app.py).
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+from math import ceil
+from quart import Quart, jsonify, request
+from async_database import AsyncDatabase
+from config import Config
+from database import MIN_YEAR, MAX_YEAR
+
+app = Quart(__name__)
+app.config['SECRET_KEY'] = Config.SECRET_KEY
+db = AsyncDatabase.get_instance()
+
+@app.before_serving
+async def startup():
+    await db.connect()
+
+@app.after_serving
+async def shutdown():
+    await db.disconnect()
+
+@app.route('/api/nodes')
+async def get_nodes():
+    try:
+        dataset_id = request.args.get('dataset_id')
+        if not dataset_id:
+            return jsonify({'error': 'No dataset_id provided'}), 400
+
+        dataset_id = int(dataset_id)
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 100))
+        x = float(request.args.get('x', 0))
+        y = float(request.args.get('y', 0))
+        z = float(request.args.get('z', 0))
+        radius = float(request.args.get('radius', 1000))
+        year_from = request.args.get('year_from')
+        year_to = request.args.get('year_to')
+
+        offset = (page - 1) * per_page
+
+        # Optional birth-year window, served from the (dataset_id, birth_year) index
+        shape, filters = 'nodes_in_radius', (dataset_id,)
+        if year_from or year_to:
+            shape = 'nodes_in_radius_between_years'
+            filters = (dataset_id, int(year_from) if year_from else MIN_YEAR, int(year_to) if year_to else MAX_YEAR)
+
+        nodes = await db.execute_named(shape, (*filters, x, y, z, radius, per_page, offset))
+
+        if not nodes:
+            return jsonify({'nodes': [], 'page': page, 'per_page': per_page, 'total_pages': 0, 'total_count': 0})
+
+        count_result = await db.execute_named(f"count_{shape}", (*filters, x, y, z, radius))
+
+        total_count = count_result[0]['count']
+        total_pages = ceil(total_count / per_page)
+
+        return jsonify({
+            'nodes': nodes,
+            'page': page,
+            'per_page': per_page,
+            'total_pages': total_pages,
+            'total_count': total_count
+        })
+    except Exception as e:
+        print(f"Error in get_nodes: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/connections')
+async def get_connections():
+    try:
+        dataset_id = request.args.get('dataset_id')
+        if not dataset_id:
+            return jsonify({'error': 'No dataset_id provided'}), 400
+
+        dataset_id = int(dataset_id)
+        node_ids = request.args.get('node_ids', '').split(',')
+        node_ids = [id for id in node_ids if id and id.lower() != 'undefined']
+
+        if not node_ids:
+            return jsonify({
+                'connections': [],
+                'page': 1,
+                'per_page': 0,
+                'total_pages': 0,
+                'total_count': 0
+            })
+
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 100))
+
+        offset = (page - 1) * per_page
+
+        connections = await db.execute_named('connections_for_nodes', (dataset_id, node_ids, node_ids, per_page, offset))
+
+        count_result = await db.execute_named('count_connections_for_nodes', (dataset_id, node_ids, node_ids))
+
+        total_count = count_result[0]['count']
+        total_pages = ceil(total_count / per_page)
+
+        return jsonify({
+            'connections': connections,
+            'page': page,
+            'per_page': per_page,
+            'total_pages': total_pages,
+            'total_count': total_count
+        })
+    except Exception as e:
+        print(f"Error in get_connections: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/dataset/<int:dataset_id>', methods=['GET'])
+async def get_dataset(dataset_id):
+    nodes = await db.execute_named('dataset_nodes', (dataset_id,))
+    connections = await db.execute_named('dataset_connections', (dataset_id,))
+    print(f"Retrieved dataset {dataset_id}: {len(nodes)} nodes and {len(connections)} connections")
+    return jsonify({'nodes': nodes, 'connections': connections})
+
+if __name__ == '__main__':
+    app.run(port=5001, debug=True)
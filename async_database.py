@@ -0,0 +1,68 @@
+import asyncpg
+from config import Config
+from database import QUERY_SHAPES, numbered_placeholders
+
+
+class AsyncDatabase:
+    _instance = None
+
+    @staticmethod
+    def get_instance():
+        if AsyncDatabase._instance is None:
+            AsyncDatabase()
+        return AsyncDatabase._instance
+
+    def __init__(self):
+        if AsyncDatabase._instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            AsyncDatabase._instance = self
+            self.pool = None
+
+    async def connect(self):
+        try:
+            self.pool = await asyncpg.create_pool(
+                database=Config.DB_NAME,
+                user=Config.DB_USER,
+                password=Config.DB_PASSWORD,
+                host=Config.DB_HOST,
+                min_size=Config.DB_POOL_MIN_SIZE,
+                max_size=Config.DB_POOL_MAX_SIZE
+            )
+            print("Async database pool established successfully.")
+        except (asyncpg.PostgresError, OSError) as e:
+            print(f"Error while creating asyncpg pool: {e}")
+            raise
+
+    async def disconnect(self):
+        if self.pool:
+            await self.pool.close()
+            print("Async PostgreSQL pool is closed")
+        self.pool = None
+
+    async def execute_query(self, query, params=None):
+        if self.pool is None:
+            await self.connect()
+        async with self.pool.acquire() as conn:
+            try:
+                rows = await conn.fetch(numbered_placeholders(query), *(params or ()))
+            except asyncpg.PostgresError as e:
+                print(f"Database error: {e}")
+                raise
+        return [dict(row) for row in rows]
+
+    async def execute_update(self, query, params=None):
+        if self.pool is None:
+            await self.connect()
+        async with self.pool.acquire() as conn:
+            try:
+                status = await conn.execute(numbered_placeholders(query), *(params or ()))
+            except asyncpg.PostgresError as e:
+                print(f"Database error: {e}")
+                raise
+        # Command tags look like "UPDATE 3" or "INSERT 0 1"
+        return int(status.split()[-1]) if status.split()[-1].isdigit() else 0
+
+    async def execute_named(self, name, params=None):
+        # asyncpg already caches prepared statements per pooled connection
+        return await self.execute_query(QUERY_SHAPES[name], params)
@@ -0,0 +1,71 @@
+import argparse
+import contextlib
+import os
+import random
+import tempfile
+import time
+
+from ged_parser import GEDParser
+
+
+def generate_ged_file(path, num_families):
+    """Write a synthetic GEDCOM file with two parents and a few children per family."""
+    random.seed(42)
+    person_id = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("0 HEAD\n1 CHAR UTF-8\n")
+        for fam in range(1, num_families + 1):
+            members = []
+            for role in ('HUSB', 'WIFE') + ('CHIL',) * random.randint(1, 4):
+                person_id += 1
+                members.append((role, person_id))
+                f.write(f"0 @I{person_id}@ INDI\n")
+                f.write(f"1 NAME Person /Number{person_id}/\n")
+                f.write(f"1 SEX {'M' if role == 'HUSB' else 'F' if role == 'WIFE' else random.choice('MF')}\n")
+                f.write("1 BIRT\n")
+                f.write(f"2 DATE {random.randint(1, 28)} JAN {random.randint(1700, 2000)}\n")
+                f.write(f"1 {'FAMC' if role == 'CHIL' else 'FAMS'} @F{fam}@\n")
+            f.write(f"0 @F{fam}@ FAM\n")
+            for role, pid in members:
+                f.write(f"1 {role} @I{pid}@\n")
+        f.write("0 TRLR\n")
+
+
+def timed_parse(file_path, workers):
+    parser = GEDParser()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        if workers is None:
+            data = parser.parse_file(file_path)
+        else:
+            data = parser.parse_file_parallel(file_path, workers=workers)
+        elapsed = time.perf_counter() - start
+    return data, elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare sequential and parallel GEDCOM parsing")
+    arg_parser.add_argument('--families', type=int, default=int(os.getenv('BENCH_NUM_FAMILIES', 50000)))
+    arg_parser.add_argument('--file', help="Benchmark an existing .ged file instead of a generated one")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = args.file
+        if not file_path:
+            file_path = os.path.join(tmp_dir, 'bench.ged')
+            generate_ged_file(file_path, args.families)
+        print(f"File: {file_path} ({os.path.getsize(file_path) / 1e6:.1f} MB)")
+
+        expected, baseline = timed_parse(file_path, None)
+        print(f"sequential   {baseline:8.2f}s")
+
+        cpu_count = os.cpu_count() or 1
+        worker_counts = sorted({w for w in (2, 4, 8, 16, 32) if w < cpu_count} | {cpu_count})
+        for workers in worker_counts:
+            data, elapsed = timed_parse(file_path, workers)
+            status = 'ok' if data == expected else 'MISMATCH'
+            print(f"{workers:3d} workers  {elapsed:8.2f}s  speedup {baseline / elapsed:5.2f}x  {status}")
+
+
+if __name__ == '__main__':
+    main()
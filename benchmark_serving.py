@@ -0,0 +1,77 @@
+import argparse
+import json
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+            ok = response.status == 200
+    except Exception:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def run_load(url, concurrency, total_requests):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(fetch, [url] * total_requests))
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    if not latencies:
+        return {'rps': 0, 'p50_ms': None, 'p99_ms': None, 'errors': errors}
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'errors': errors
+    }
+
+
+def sample_node_ids(base_url, dataset_id, count=50):
+    url = f"{base_url}/api/nodes?dataset_id={dataset_id}&x=0&y=0&z=0&radius=1000&per_page={count}"
+    with urllib.request.urlopen(url, timeout=60) as response:
+        nodes = json.loads(response.read())['nodes']
+    return [str(node['id']) for node in nodes]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare the Flask and ASGI serving modes under concurrent load")
+    arg_parser.add_argument('--sync-url', default='http://localhost:5000')
+    arg_parser.add_argument('--async-url', default='http://localhost:5001')
+    arg_parser.add_argument('--dataset-id', type=int, required=True)
+    arg_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64, 256])
+    arg_parser.add_argument('--requests', type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    node_ids = sample_node_ids(args.async_url, args.dataset_id)
+    paths = [
+        f"/api/nodes?dataset_id={args.dataset_id}&x=0&y=0&z=0&radius=1000",
+        f"/api/connections?dataset_id={args.dataset_id}&node_ids={','.join(node_ids)}",
+        f"/api/dataset/{args.dataset_id}",
+    ]
+
+    results = []
+    for path in paths:
+        for concurrency in args.concurrency:
+            for mode, base_url in (('sync', args.sync_url), ('async', args.async_url)):
+                stats = run_load(base_url + path, concurrency, args.requests)
+                stats.update({'mode': mode, 'path': path, 'concurrency': concurrency})
+                results.append(stats)
+                p50 = f"{stats['p50_ms']:.1f}" if stats['p50_ms'] is not None else '-'
+                p99 = f"{stats['p99_ms']:.1f}" if stats['p99_ms'] is not None else '-'
+                print(f"{mode:5s} c={concurrency:<4d} {stats['rps']:8.1f} req/s  p50 {p50}ms  p99 {p99}ms  "
+                      f"errors {stats['errors']}  {path}")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
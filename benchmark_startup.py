@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so every measurement is a cold start
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app(warm_up={with_db})
+created = time.perf_counter()
+ready = None
+if {with_db}:
+    deadline = created + {ready_timeout}
+    while not app.db.ready and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    ready = (time.perf_counter() - start) * 1000 if app.db.ready else None
+heavy = [name for name in ('chardet', 'ged_parser', 'ancestry', 'reconciliation') if name in sys.modules]
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'ready_ms': ready,
+    'eager_modules': heavy
+}}))
+"""
+
+
+def run_probe(with_db, ready_timeout):
+    code = PROBE.format(with_db=with_db, ready_timeout=ready_timeout)
+    output = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Measure cold import and app factory time of app.py")
+    arg_parser.add_argument('--runs', type=int, default=10)
+    arg_parser.add_argument('--with-db', action='store_true',
+                            help="Also warm up the database and measure time until /api/ready would report ready")
+    arg_parser.add_argument('--ready-timeout', type=float, default=30)
+    arg_parser.add_argument('--max-ms', type=float,
+                            help="Exit with status 1 if median import + create_app time exceeds this")
+    args = arg_parser.parse_args()
+
+    results = [run_probe(args.with_db, args.ready_timeout) for _ in range(args.runs)]
+
+    import_ms = statistics.median(r['import_ms'] for r in results)
+    create_ms = statistics.median(r['create_app_ms'] for r in results)
+    print(f"import app      median {import_ms:8.1f} ms")
+    print(f"create_app()    median {create_ms:8.1f} ms")
+    if args.with_db:
+        ready = [r['ready_ms'] for r in results if r['ready_ms'] is not None]
+        print(f"ready           median {statistics.median(ready):8.1f} ms" if ready else "ready           never (timed out)")
+
+    eager = sorted({name for r in results for name in r['eager_modules']})
+    if eager:
+        print(f"Modules that should load lazily were imported at startup: {', '.join(eager)}")
+
+    if args.max_ms is not None and import_ms + create_ms > args.max_ms:
+        print(f"Startup regression: {import_ms + create_ms:.1f} ms exceeds budget of {args.max_ms:.1f} ms")
+        sys.exit(1)
+    if eager:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""Query-plan regression checks for every registered hot query shape.
+
+Seeds a scratch PostgreSQL database with a synthetic multi-dataset workload,
+then runs EXPLAIN (FORMAT JSON, ANALYZE) on each shape in database.QUERY_SHAPES
+and checks that:
+  - no Nodes, Connections or Ancestry access is a sequential scan (the probed
+    dataset is a small slice of each table, so an index should always win)
+  - the plan uses every index its plan case names, so a dropped index that the
+    planner quietly works around still fails
+  - scans on those tables do not discard many more rows by filter than they
+    return, which is what a scan on the wrong index looks like
+  - planner row estimates on those scans are within a bound of the actual rows
+Timings are written to a JSON file. The script exits with status 1 on any
+failure, including a registered shape that has no plan case below.
+
+    python check_query_plans.py --datasets 10 --nodes-per-dataset 20000
+
+The scratch database (PLAN_TEST_DB, default huge_vision_plan_test) is dropped
+and recreated on every run.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+# Importing these modules registers their query shapes
+import reconciliation  # noqa: F401
+import sampling  # noqa: F401
+from database import QUERY_SHAPES, numbered_placeholders
+from reset_database import reset_database
+
+CHECKED_RELATIONS = {'nodes', 'connections', 'ancestry'}
+DEFAULT_MAX_ESTIMATE_RATIO = 100
+# Rows a scan may remove by filter per row it returns
+DEFAULT_MAX_FILTER_RATIO = 10
+# Serving runs a shape many times; PostgreSQL may switch to a generic plan
+# after five executions, so each shape is warmed past that before EXPLAIN
+WARM_EXECUTIONS = 6
+
+SAMPLE_IDS = [f"I{i}" for i in range(1, 101)]
+
+# Representative parameters per registered shape, built from the seeded context,
+# and the indexes each plan must use. A tuple lists interchangeable indexes.
+NODES_BY_DATASET = 'idx_nodes_dataset_birth_year'
+CONNECTIONS_BY_DATASET = ('idx_connections_dataset_edge', 'idx_connections_dataset_to')
+PLAN_CASES = {
+    # There is no spatial index, so radius filtering within the dataset is expected
+    'nodes_in_radius': {'params': lambda ctx: (ctx['dataset_id'], 0, 0, 0, 5000, 100, 0),
+                        'indexes': [NODES_BY_DATASET], 'max_filter_ratio': None},
+    'count_nodes_in_radius': {'params': lambda ctx: (ctx['dataset_id'], 0, 0, 0, 5000),
+                              'indexes': [NODES_BY_DATASET], 'max_filter_ratio': None},
+    'nodes_in_radius_between_years': {'params': lambda ctx: (ctx['dataset_id'], 1700, 1710, 0, 0, 0, 1e9, 100, 0),
+                                      'indexes': [NODES_BY_DATASET]},
+    'count_nodes_in_radius_between_years': {'params': lambda ctx: (ctx['dataset_id'], 1700, 1710, 0, 0, 0, 1e9),
+                                            'indexes': [NODES_BY_DATASET]},
+    'connections_for_nodes': {'params': lambda ctx: (ctx['dataset_id'], SAMPLE_IDS, SAMPLE_IDS, 100, 0),
+                              'indexes': ['idx_connections_dataset_edge', 'idx_connections_dataset_to']},
+    'count_connections_for_nodes': {'params': lambda ctx: (ctx['dataset_id'], SAMPLE_IDS, SAMPLE_IDS),
+                                    'indexes': ['idx_connections_dataset_edge', 'idx_connections_dataset_to']},
+    'dataset_nodes': {'params': lambda ctx: (ctx['dataset_id'],), 'indexes': [NODES_BY_DATASET]},
+    'dataset_connections': {'params': lambda ctx: (ctx['dataset_id'],), 'indexes': [CONNECTIONS_BY_DATASET]},
+    'ancestry_depth': {'params': lambda ctx: (ctx['dataset_id'], 'I1', 'I1024'), 'indexes': ['ancestry_pkey']},
+    'nearest_common_ancestors': {'params': lambda ctx: (ctx['dataset_id'], 'I1000', 'I1500', 10),
+                                 'indexes': ['idx_ancestry_descendant']},
+    'nodes_bucket_summaries': {'params': lambda ctx: (256, ctx['dataset_id']), 'indexes': [NODES_BY_DATASET]},
+    # Buckets are a hash of the id, so picking a few of them is a filter by design
+    'nodes_bucket_fingerprints': {'params': lambda ctx: (256, ctx['dataset_id'], [1, 2, 3]),
+                                  'indexes': [NODES_BY_DATASET], 'max_filter_ratio': None},
+    'connections_bucket_summaries': {'params': lambda ctx: (256, ctx['dataset_id']),
+                                     'indexes': [CONNECTIONS_BY_DATASET]},
+    'connections_bucket_fingerprints': {'params': lambda ctx: (256, ctx['dataset_id'], [1, 2, 3]),
+                                        'indexes': [CONNECTIONS_BY_DATASET], 'max_filter_ratio': None},
+    'nodes_by_ids': {'params': lambda ctx: (ctx['dataset_id'], SAMPLE_IDS), 'indexes': ['nodes_pkey']},
+    'connections_by_ids': {'params': lambda ctx: (ctx['dataset_id'], list(range(1, 101))),
+                           'indexes': ['connections_pkey']},
+    'sample_nodes_random': {'params': lambda ctx: (ctx['dataset_id'], 1.0, 8, 8, 8, 2000),
+                            'indexes': [NODES_BY_DATASET]},
+    # Page sampling reads whole pages of every dataset and filters to one
+    'sample_nodes_tablesample': {'params': lambda ctx: (10.0, ctx['dataset_id'], 8, 8, 8, 2000),
+                                 'indexes': [], 'max_filter_ratio': None},
+    'connections_among_nodes': {'params': lambda ctx: (ctx['dataset_id'], SAMPLE_IDS, SAMPLE_IDS),
+                                'indexes': ['idx_connections_dataset_edge']},
+}
+
+
+def seed(cur, datasets, nodes_per_dataset):
+    """Fill every table with `datasets` equally sized synthetic family trees.
+
+    Each dataset is a binary tree (person g's parent is g // 2), so the
+    ancestry closure can be generated directly: g's ancestor at depth k is g >> k.
+    """
+    cur.execute(
+        "INSERT INTO Datasets (name) SELECT 'Plan test ' || g FROM generate_series(1, %s) g RETURNING id",
+        (datasets,)
+    )
+    dataset_ids = [row['id'] for row in cur.fetchall()]
+
+    cur.execute("""
+        INSERT INTO Nodes (id, dataset_id, name, type, x, y, z, sex, birth_year, death_year, generation)
+        SELECT 'I' || g, d, 'Person ' || g, 'Person',
+               random() * 20000 - 10000, random() * 20000 - 10000, random() * 20000 - 10000,
+               CASE WHEN random() < 0.5 THEN 'M' ELSE 'F' END,
+               1500 + (g %% 500), 1560 + (g %% 500), floor(log(2, g))::int
+        FROM unnest(%s::int[]) d CROSS JOIN generate_series(1, %s) g
+    """, (dataset_ids, nodes_per_dataset))
+
+    cur.execute("""
+        INSERT INTO Connections (from_node_id, to_node_id, type, dataset_id)
+        SELECT 'I' || (g / 2), 'I' || g, 'Parent-Child', d
+        FROM unnest(%s::int[]) d CROSS JOIN generate_series(2, %s) g
+    """, (dataset_ids, nodes_per_dataset))
+
+    cur.execute("""
+        INSERT INTO Ancestry (dataset_id, ancestor_id, descendant_id, depth)
+        SELECT d, 'I' || (g >> k), 'I' || g, k
+        FROM unnest(%s::int[]) d CROSS JOIN generate_series(1, %s) g CROSS JOIN generate_series(0, 31) k
+        WHERE (g >> k) >= 1
+    """, (dataset_ids, nodes_per_dataset))
+
+    cur.execute("ANALYZE")
+    return dataset_ids
+
+
+def walk(plan, under_limit=False):
+    """Yield (plan node, under_limit) for every node in an EXPLAIN JSON plan tree."""
+    yield plan, under_limit
+    under_limit = under_limit or plan['Node Type'] == 'Limit'
+    for child in plan.get('Plans', []):
+        yield from walk(child, under_limit)
+
+
+def check_plan(name, plan, case):
+    max_ratio = case.get('max_estimate_ratio', DEFAULT_MAX_ESTIMATE_RATIO)
+    max_filter_ratio = case.get('max_filter_ratio', DEFAULT_MAX_FILTER_RATIO)
+    failures = []
+
+    used = {node['Index Name'] for node, _ in walk(plan) if 'Index Name' in node}
+    for required in case.get('indexes', []):
+        options = (required,) if isinstance(required, str) else required
+        if not used.intersection(options):
+            failures.append(f"{name}: plan does not use {' or '.join(options)} "
+                            f"(uses {', '.join(sorted(used)) or 'no index'})")
+
+    for node, under_limit in walk(plan):
+        relation = (node.get('Relation Name') or '').lower()
+        if relation not in CHECKED_RELATIONS:
+            continue
+        if node['Node Type'] == 'Seq Scan':
+            failures.append(f"{name}: sequential scan on {relation}")
+        if not node.get('Actual Loops'):
+            continue
+        removed = node.get('Rows Removed by Filter', 0)
+        if max_filter_ratio is not None and removed > max_filter_ratio * max(node['Actual Rows'], 1):
+            failures.append(
+                f"{name}: {node['Node Type']} on {relation} removed {removed} rows by filter "
+                f"to return {node['Actual Rows']} (bound {max_filter_ratio}x)"
+            )
+        # A scan cut short by LIMIT says nothing about the estimate
+        if under_limit:
+            continue
+        estimated, actual = node['Plan Rows'], node['Actual Rows']
+        ratio = max(estimated, actual) / max(min(estimated, actual), 1)
+        if max_ratio is not None and ratio > max_ratio:
+            failures.append(
+                f"{name}: {node['Node Type']} on {relation} estimated {estimated} rows, "
+                f"got {actual} (off by {ratio:.0f}x, bound {max_ratio}x)"
+            )
+    return failures
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Check query plans of registered hot query shapes")
+    arg_parser.add_argument('--datasets', type=int, default=10)
+    arg_parser.add_argument('--nodes-per-dataset', type=int, default=20000)
+    arg_parser.add_argument('--output', default='query_plan_timings.json')
+    args = arg_parser.parse_args()
+
+    plan_db = os.getenv('PLAN_TEST_DB', 'huge_vision_plan_test')
+    if plan_db == os.getenv('DB_NAME', 'huge_vision'):
+        sys.exit("PLAN_TEST_DB must not be the application database; it is dropped on every run")
+
+    os.environ['DB_NAME'] = plan_db
+    reset_database()
+
+    conn = psycopg2.connect(
+        dbname=plan_db,
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        host=os.getenv('DB_HOST', 'localhost')
+    )
+    conn.autocommit = True
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+
+    start = time.perf_counter()
+    dataset_ids = seed(cur, args.datasets, args.nodes_per_dataset)
+    print(f"Seeded {args.datasets} datasets of {args.nodes_per_dataset} people in {time.perf_counter() - start:.1f}s")
+    ctx = {'dataset_id': dataset_ids[len(dataset_ids) // 2]}
+
+    failures = [f"{name}: registered query shape has no plan case" for name in QUERY_SHAPES if name not in PLAN_CASES]
+    failures += [f"{name}: plan case lists no expected indexes" for name, case in PLAN_CASES.items() if 'indexes' not in case]
+    timings = {}
+    for name, query in QUERY_SHAPES.items():
+        case = PLAN_CASES.get(name)
+        if case is None:
+            continue
+        params = case['params'](ctx)
+        placeholders = ', '.join(['%s'] * len(params))
+
+        cur.execute(f"PREPARE {name} AS {numbered_placeholders(query)}")
+        for _ in range(WARM_EXECUTIONS):
+            cur.execute(f"EXECUTE {name} ({placeholders})", params)
+        cur.execute(f"EXPLAIN (FORMAT JSON, ANALYZE) EXECUTE {name} ({placeholders})", params)
+        explained = cur.fetchone()['QUERY PLAN'][0]
+        cur.execute(f"DEALLOCATE {name}")
+
+        shape_failures = check_plan(name, explained['Plan'], case)
+        failures.extend(shape_failures)
+        timings[name] = {
+            'planning_ms': explained.get('Planning Time'),
+            'execution_ms': explained['Execution Time'],
+            'passed': not shape_failures
+        }
+        print(f"{'ok  ' if not shape_failures else 'FAIL'} {name:40s} {explained['Execution Time']:9.2f} ms")
+
+    cur.close()
+    conn.close()
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'datasets': args.datasets,
+            'nodes_per_dataset': args.nodes_per_dataset,
+            'shapes': timings
+        }, f, indent=2)
+    print(f"Timings written to {args.output}")
+
+    if failures:
+        print("\n".join(failures))
+        sys.exit(1)
+    print("All query plans passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,5 +5,19 @@ class Config:
     DB_USER = os.environ.get('DB_USER', 'default_user')
     DB_PASSWORD = os.environ.get('DB_PASSWORD', 'default_password')
     DB_HOST = os.environ.get('DB_HOST', 'localhost')
+    # Optional read/write routing: a primary DSN overrides the DB_* fields above,
+    # and reads are spread over the comma-separated replica DSNs
+    DB_PRIMARY_DSN = os.environ.get('DB_PRIMARY_DSN')
+    DB_READ_DSNS = [dsn.strip() for dsn in os.environ.get('DB_READ_DSNS', '').split(',') if dsn.strip()]
+    DB_READ_POLICY = os.environ.get('DB_READ_POLICY', 'round_robin')  # or 'least_loaded'
+    # Seconds a session keeps reading from the primary after it writes
+    DB_STICKY_SECONDS = float(os.environ.get('DB_STICKY_SECONDS', 5))
     SECRET_KEY = os.environ.get('SECRET_KEY', 'default_secret_key')
+    # Set to false to switch off request rate limits (e.g. for load benchmarks)
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() not in ('false', '0', 'no')
+    # Connection pool bounds for the async (ASGI) serving mode
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 20))
+    # Number of processes used to parse uploaded GEDCOM files (1 = sequential)
+    GED_PARSE_WORKERS = int(os.environ.get('GED_PARSE_WORKERS', 1))
 
@@ -1,7 +1,96 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import itertools
 import os
+import re
+import threading
+import time
 from contextlib import contextmanager
+from config import Config
+
+_PLACEHOLDER = re.compile(r'%(s|%)')
+_WRITE_KEYWORDS = re.compile(r'\b(insert|update|delete|merge|create|drop|alter|truncate|lock)\b', re.IGNORECASE)
+# EXPLAIN with its optional parenthesised options; ANALYZE in either form runs the query
+_EXPLAIN = re.compile(r'\s*explain\s*(\([^)]*\))?', re.IGNORECASE)
+_ANALYZE = re.compile(r'\banaly[sz]e\b', re.IGNORECASE)
+
+READ_POLICIES = ('round_robin', 'least_loaded')
+REPLICA_RETRY_SECONDS = 30
+# Open bounds for birth-year windows given only one end
+MIN_YEAR = -9999
+MAX_YEAR = 9999
+
+# Hot query shapes, written with psycopg2-style %s placeholders. Each shape is
+# PREPAREd once per connection and then run by name through execute_named.
+QUERY_SHAPES = {
+    'nodes_in_radius': """
+        SELECT * FROM Nodes
+        WHERE dataset_id = %s AND POWER(x - %s, 2) + POWER(y - %s, 2) + POWER(z - %s, 2) <= POWER(%s, 2)
+        LIMIT %s OFFSET %s
+    """,
+    'count_nodes_in_radius': """
+        SELECT COUNT(*) FROM Nodes
+        WHERE dataset_id = %s AND POWER(x - %s, 2) + POWER(y - %s, 2) + POWER(z - %s, 2) <= POWER(%s, 2)
+    """,
+    'nodes_in_radius_between_years': """
+        SELECT * FROM Nodes
+        WHERE dataset_id = %s AND birth_year BETWEEN %s AND %s
+        AND POWER(x - %s, 2) + POWER(y - %s, 2) + POWER(z - %s, 2) <= POWER(%s, 2)
+        ORDER BY birth_year, id
+        LIMIT %s OFFSET %s
+    """,
+    'count_nodes_in_radius_between_years': """
+        SELECT COUNT(*) FROM Nodes
+        WHERE dataset_id = %s AND birth_year BETWEEN %s AND %s
+        AND POWER(x - %s, 2) + POWER(y - %s, 2) + POWER(z - %s, 2) <= POWER(%s, 2)
+    """,
+    'connections_for_nodes': """
+        SELECT * FROM Connections
+        WHERE dataset_id = %s AND (from_node_id = ANY(%s) OR to_node_id = ANY(%s))
+        LIMIT %s OFFSET %s
+    """,
+    'count_connections_for_nodes': """
+        SELECT COUNT(*) FROM Connections
+        WHERE dataset_id = %s AND (from_node_id = ANY(%s) OR to_node_id = ANY(%s))
+    """,
+    'dataset_nodes': "SELECT * FROM Nodes WHERE dataset_id = %s",
+    'dataset_connections': "SELECT * FROM Connections WHERE dataset_id = %s",
+    'ancestry_depth': """
+        SELECT depth FROM Ancestry
+        WHERE dataset_id = %s AND ancestor_id = %s AND descendant_id = %s
+    """,
+    'nearest_common_ancestors': """
+        SELECT a.ancestor_id, a.depth AS generations_a, b.depth AS generations_b
+        FROM Ancestry a
+        JOIN Ancestry b ON b.dataset_id = a.dataset_id AND b.ancestor_id = a.ancestor_id
+        WHERE a.dataset_id = %s AND a.descendant_id = %s AND b.descendant_id = %s
+        ORDER BY a.depth + b.depth, a.ancestor_id
+        LIMIT %s
+    """,
+}
+
+def register_query_shape(name, query):
+    if not name.isidentifier():
+        raise ValueError(f"Query shape name must be a valid identifier: {name}")
+    QUERY_SHAPES[name] = query
+
+def numbered_placeholders(query):
+    """Rewrite %s placeholders into the $1, $2, ... form used by PREPARE and asyncpg.
+
+    A psycopg2-escaped %% becomes a plain %, since neither PREPARE nor asyncpg
+    interpolates the query text.
+    """
+    counter = itertools.count(1)
+    return _PLACEHOLDER.sub(lambda m: f"${next(counter)}" if m.group(1) == 's' else '%', query)
+
+def is_read_query(query):
+    """True for plain SELECTs, and EXPLAIN without ANALYZE of one, which are safe to send to a read replica."""
+    explain = _EXPLAIN.match(query)
+    if explain:
+        if _ANALYZE.search(explain.group(0)) or _ANALYZE.match(query[explain.end():].lstrip()):
+            return False
+        query = query[explain.end():]
+    return query.lstrip().lower().startswith(('select', 'with')) and not _WRITE_KEYWORDS.search(query)
 
 class Database:
     _instance = None
@@ -19,37 +108,181 @@ class Database:
             Database()
         return Database._instance
 
-    def __init__(self):
+    def __init__(self, primary_dsn=None, read_dsns=None, read_policy=None, sticky_seconds=None):
         if Database._instance is not None:
             raise Exception("This class is a singleton!")
         else:
             Database._instance = self
             self.conn = None
+            self.primary_dsn = primary_dsn if primary_dsn is not None else Config.DB_PRIMARY_DSN
+            self.replicas = [
+                {'dsn': dsn, 'conn': None, 'in_flight': 0, 'retry_at': 0, 'lock': threading.RLock()}
+                for dsn in (read_dsns if read_dsns is not None else Config.DB_READ_DSNS)
+            ]
+            self.read_policy = read_policy or Config.DB_READ_POLICY
+            if self.read_policy not in READ_POLICIES:
+                raise ValueError(f"Unknown read policy: {self.read_policy}")
+            self.sticky_seconds = sticky_seconds if sticky_seconds is not None else Config.DB_STICKY_SECONDS
+            self.next_replica = 0
+            self.local = threading.local()
+            self.lock = threading.Lock()
+            # Held for a whole transaction so threads never interleave on one connection
+            self.primary_lock = threading.RLock()
+            # Prepared statement names, keyed by id() of the connection they live on
+            self.prepared = {}
+            self.query_stats = {}
+            self.ready = False
+            self.warm_up_pid = None
+
+    def warm_up(self):
+        """Open the primary and replica connections and PREPARE every registered query shape."""
+        with self.primary_lock:
+            connections = [(self.primary_connection(), self.primary_lock)]
+        for replica in self.replicas:
+            try:
+                with replica['lock']:
+                    connections.append((self.replica_connection(replica), replica['lock']))
+            except psycopg2.OperationalError as e:
+                print(f"Read replica unavailable during warm-up: {e}")
+                replica['retry_at'] = time.monotonic() + REPLICA_RETRY_SECONDS
+
+        # Each shape is prepared under the connection's lock, so the commit or
+        # rollback never lands in the middle of a request's transaction
+        for conn, lock in connections:
+            prepared = self.prepared.setdefault(id(conn), set())
+            for name, query in list(QUERY_SHAPES.items()):
+                with lock:
+                    if name in prepared:
+                        continue
+                    try:
+                        with conn.cursor() as cursor:
+                            cursor.execute(f"PREPARE {name} AS {numbered_placeholders(query)}")
+                        conn.commit()
+                        prepared.add(name)
+                    except psycopg2.Error as e:
+                        if not conn.closed:
+                            conn.rollback()
+                        print(f"Could not prepare query shape {name}: {e}")
+        self.ready = True
+        print(f"Database warm-up complete ({len(connections)} connections)")
+
+    def reset_after_fork(self):
+        """Forget connections inherited from a parent process without closing them."""
+        self.conn = None
+        for replica in self.replicas:
+            replica['conn'] = None
+            replica['in_flight'] = 0
+            replica['lock'] = threading.RLock()
+        self.prepared = {}
+        self.lock = threading.Lock()
+        self.primary_lock = threading.RLock()
+        self.local = threading.local()
+        self.ready = False
+        self.warm_up_pid = None
+
+    def begin_request(self, last_write=None):
+        """Start tracking the current thread's request; last_write is the client's previous write time (epoch seconds)."""
+        self.local.last_write = last_write
+        self.local.wrote = False
+
+    def request_wrote(self):
+        return getattr(self.local, 'wrote', False)
+
+    def is_sticky(self):
+        last_write = getattr(self.local, 'last_write', None)
+        return last_write is not None and time.time() - last_write < self.sticky_seconds
+
+    def mark_write(self):
+        self.local.last_write = time.time()
+        self.local.wrote = True
+
+    def choose_replica(self):
+        if not self.replicas or self.is_sticky():
+            return None
+        now = time.monotonic()
+        with self.lock:
+            available = [replica for replica in self.replicas if replica['retry_at'] <= now]
+            if not available:
+                return None
+            if self.read_policy == 'least_loaded':
+                replica = min(available, key=lambda r: r['in_flight'])
+            else:
+                replica = available[self.next_replica % len(available)]
+                self.next_replica += 1
+            replica['in_flight'] += 1
+        return replica
+
+    def release_replica(self, replica):
+        with self.lock:
+            replica['in_flight'] -= 1
+
+    def primary_connection(self):
+        if self.conn is None or self.conn.closed:
+            self.connect()
+        return self.conn
+
+    def replica_connection(self, replica):
+        if replica['conn'] is None or replica['conn'].closed:
+            if replica['conn'] is not None:
+                self.prepared.pop(id(replica['conn']), None)
+            replica['conn'] = psycopg2.connect(replica['dsn'])
+            print(f"Read replica connection established: {replica['conn'].get_dsn_parameters().get('host')}")
+        return replica['conn']
 
     @contextmanager
-    def get_cursor(self):
+    def get_cursor(self, readonly=False):
+        conn = None
+        cursor = None
+        lock = None
+        replica = self.choose_replica() if readonly else None
         try:
-            if self.conn is None or self.conn.closed:
-                self.connect()
-            cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+            if replica:
+                lock = replica['lock']
+                lock.acquire()
+                try:
+                    conn = self.replica_connection(replica)
+                except psycopg2.OperationalError as e:
+                    print(f"Read replica unavailable, falling back to primary: {e}")
+                    replica['retry_at'] = time.monotonic() + REPLICA_RETRY_SECONDS
+                    lock.release()
+                    lock = None
+                    self.release_replica(replica)
+                    replica = None
+            if conn is None:
+                lock = self.primary_lock
+                lock.acquire()
+                conn = self.primary_connection()
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
             yield cursor
-            self.conn.commit()
+            conn.commit()
+            if not readonly:
+                self.mark_write()
         except psycopg2.Error as e:
-            self.conn.rollback()
+            if conn is not None and not conn.closed:
+                conn.rollback()
             print(f"Database error: {e}")
             raise
         finally:
             if cursor:
                 cursor.close()
+            if lock:
+                lock.release()
+            if replica:
+                self.release_replica(replica)
 
     def connect(self):
         try:
-            self.conn = psycopg2.connect(
-                dbname=os.environ.get('DB_NAME', 'huge_vision'),
-                user=os.environ.get('DB_USER', 'your_username'),
-                password=os.environ.get('DB_PASSWORD', 'your_password'),
-                host=os.environ.get('DB_HOST', 'localhost')
-            )
+            if self.conn is not None:
+                self.prepared.pop(id(self.conn), None)
+            if self.primary_dsn:
+                self.conn = psycopg2.connect(self.primary_dsn)
+            else:
+                self.conn = psycopg2.connect(
+                    dbname=os.environ.get('DB_NAME', 'huge_vision'),
+                    user=os.environ.get('DB_USER', 'your_username'),
+                    password=os.environ.get('DB_PASSWORD', 'your_password'),
+                    host=os.environ.get('DB_HOST', 'localhost')
+                )
             print("Database connection established successfully.")
             self.debug_connection()
         except psycopg2.Error as e:
@@ -57,13 +290,18 @@ class Database:
             raise
 
     def disconnect(self):
+        for replica in self.replicas:
+            if replica['conn']:
+                replica['conn'].close()
+            replica['conn'] = None
         if self.conn:
             self.conn.close()
             print("PostgreSQL connection is closed")
         self.conn = None
+        self.prepared = {}
 
     def execute_query(self, query, params=None):
-        with self.get_cursor() as cursor:
+        with self.get_cursor(readonly=is_read_query(query)) as cursor:
             cursor.execute(query, params or ())
             if cursor.description:  # Check if the query returns any results
                 return cursor.fetchall()
@@ -73,3 +311,37 @@ class Database:
         with self.get_cursor() as cursor:
             cursor.execute(query, params or ())
             return cursor.rowcount
+
+    def execute_named(self, name, params=None):
+        """Run a registered query shape, preparing it on the connection first if needed.
+
+        get_cursor holds the connection's lock, so checking and preparing cannot race.
+        """
+        query = QUERY_SHAPES[name]
+        params = tuple(params or ())
+        start = time.perf_counter()
+        with self.get_cursor(readonly=is_read_query(query)) as cursor:
+            prepared = self.prepared.setdefault(id(cursor.connection), set())
+            if name not in prepared:
+                cursor.execute(f"PREPARE {name} AS {numbered_placeholders(query)}")
+                prepared.add(name)
+            if params:
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+            else:
+                cursor.execute(f"EXECUTE {name}")
+            result = cursor.fetchall() if cursor.description else None
+        self.record_timing(name, time.perf_counter() - start)
+        return result
+
+    def record_timing(self, name, elapsed):
+        stats = self.query_stats.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        elapsed_ms = elapsed * 1000
+        stats['calls'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def get_query_stats(self):
+        return {
+            name: {**stats, 'avg_ms': stats['total_ms'] / stats['calls']}
+            for name, stats in self.query_stats.items()
+        }
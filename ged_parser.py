@@ -1,4 +1,26 @@
 import chardet
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _parse_chunk(lines, first_line_num):
+    # Runs in a worker process: parse one slice of level-0 records and hand
+    # back only the entity tables, the parent does the merge.
+    parser = GEDParser()
+    for offset, line in enumerate(lines):
+        parser.process_line(line, first_line_num + offset)
+    return parser.individuals, parser.families
+
+
+def _is_record_start(line):
+    parts = line.split(None, 1)
+    if len(parts) < 2:
+        return False
+    try:
+        return int(parts[0]) == 0
+    except ValueError:
+        return False
+
 
 class GEDParser:
     def __init__(self):
@@ -39,6 +61,68 @@ class GEDParser:
         print(f"Parsed {len(self.individuals)} individuals and {len(self.families)} families")
         return self.to_json_format()
 
+    def read_lines(self, file_path):
+        encodings_to_try = ['utf-8', 'iso-8859-1', 'windows-1252']
+
+        detected_encoding = self.detect_encoding(file_path)
+        if detected_encoding:
+            encodings_to_try.insert(0, detected_encoding)
+
+        for encoding in encodings_to_try:
+            try:
+                with open(file_path, 'r', encoding=encoding) as file:
+                    lines = file.readlines()
+                print(f"Read file with encoding: {encoding}")
+                return lines
+            except UnicodeDecodeError:
+                print(f"Failed to read with encoding: {encoding}")
+                continue
+        raise ValueError(f"Could not decode {file_path} with any of {encodings_to_try}")
+
+    def split_records(self, lines, num_chunks):
+        """Split lines into roughly equal chunks that each start on a level-0 line.
+
+        Every level-0 line resets the current entity, so a chunk boundary placed
+        there never cuts a record in half. Returns (first_line_num, lines) pairs.
+        """
+        target = max(1, -(-len(lines) // max(1, num_chunks)))
+        chunks = []
+        start = 0
+        while start < len(lines):
+            end = min(start + target, len(lines))
+            while end < len(lines) and not _is_record_start(lines[end]):
+                end += 1
+            chunks.append((start + 1, lines[start:end]))
+            start = end
+        return chunks
+
+    def parse_file_parallel(self, file_path, workers=None, chunks_per_worker=4):
+        """Parse a GEDCOM file across a process pool.
+
+        The file is split on level-0 record boundaries, each chunk is parsed into
+        its own individuals/families tables, and the tables are merged in file
+        order before create_connections, so the result matches parse_file.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            return self.parse_file(file_path)
+
+        print(f"Starting to parse file with {workers} workers: {file_path}")
+        lines = self.read_lines(file_path)
+        chunks = self.split_records(lines, workers * chunks_per_worker)
+        del lines
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            first_line_nums = [first_line_num for first_line_num, _ in chunks]
+            chunk_lines = [chunk for _, chunk in chunks]
+            for individuals, families in executor.map(_parse_chunk, chunk_lines, first_line_nums):
+                self.individuals.update(individuals)
+                self.families.update(families)
+
+        self.create_connections()
+        print(f"Parsed {len(self.individuals)} individuals and {len(self.families)} families")
+        return self.to_json_format()
+
     def process_line(self, line, line_num):
         parts = line.strip().split()
         if len(parts) < 2:
@@ -70,6 +154,10 @@ class GEDParser:
         
         tag = parts[0]
         value = ' '.join(parts[1:])
+
+        # A level-2 DATE belongs to the most recent level-1 event only
+        if self.current_entity['type'] == 'individual':
+            self.current_entity['event'] = tag if tag in ('BIRT', 'DEAT') else None
         
         if tag == 'NAME' and self.current_entity['type'] == 'individual':
             self.current_entity['name'] = value.strip('/')
@@ -81,8 +169,6 @@ class GEDParser:
             self.current_entity.setdefault('children', []).append(value.strip('@'))
         elif tag in ['FAMS', 'FAMC'] and self.current_entity['type'] == 'individual':
             self.current_entity.setdefault(tag, []).append(value.strip('@'))
-        elif tag == 'BIRT' and self.current_entity['type'] == 'individual':
-            self.current_entity['birth_event'] = True
 
     def process_level_2(self, parts):
         if not self.current_entity or self.current_entity['type'] != 'individual':
@@ -91,11 +177,12 @@ class GEDParser:
         tag = parts[0]
         value = ' '.join(parts[1:])
 
-        if tag == 'DATE' and self.current_entity.get('birth_event'):
-            birth_year = self.extract_year(value)
-            if birth_year:
-                self.current_entity['birthYear'] = birth_year
-            self.current_entity['birth_event'] = False
+        if tag == 'DATE' and self.current_entity.get('event'):
+            year = self.extract_year(value)
+            if year:
+                key = 'birthYear' if self.current_entity['event'] == 'BIRT' else 'deathYear'
+                self.current_entity[key] = year
+            self.current_entity['event'] = None
 
     def extract_year(self, date_string):
         parts = date_string.split()
@@ -131,6 +218,7 @@ class GEDParser:
                 'type': 'Person',
                 'sex': individual.get('sex', 'U'),
                 'birthYear': individual.get('birthYear'),
+                'deathYear': individual.get('deathYear'),
             } for individual_id, individual in self.individuals.items()
         ]
         print(f"Generated {len(nodes)} nodes")  # Add this debug line
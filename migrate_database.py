@@ -0,0 +1,48 @@
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Idempotent statements that bring a database created by an older
+# reset_database.py up to the current schema without dropping any data
+MIGRATIONS = [
+    "CREATE INDEX IF NOT EXISTS idx_connections_dataset_edge ON Connections (dataset_id, from_node_id, to_node_id)",
+    "CREATE INDEX IF NOT EXISTS idx_connections_dataset_to ON Connections (dataset_id, to_node_id)",
+    """
+    CREATE TABLE IF NOT EXISTS Ancestry (
+        dataset_id INTEGER REFERENCES Datasets(id),
+        ancestor_id VARCHAR(255) NOT NULL,
+        descendant_id VARCHAR(255) NOT NULL,
+        depth INTEGER NOT NULL,
+        PRIMARY KEY (dataset_id, ancestor_id, descendant_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_ancestry_descendant ON Ancestry (dataset_id, descendant_id, ancestor_id, depth)",
+    "ALTER TABLE Nodes ADD COLUMN IF NOT EXISTS birth_year INTEGER",
+    "ALTER TABLE Nodes ADD COLUMN IF NOT EXISTS death_year INTEGER",
+    "ALTER TABLE Nodes ADD COLUMN IF NOT EXISTS generation INTEGER",
+    "CREATE INDEX IF NOT EXISTS idx_nodes_dataset_birth_year ON Nodes (dataset_id, birth_year)",
+]
+
+def migrate_database():
+    conn = psycopg2.connect(
+        dbname=os.getenv('DB_NAME', 'huge_vision'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        host=os.getenv('DB_HOST', 'localhost')
+    )
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    cur = conn.cursor()
+
+    for statement in MIGRATIONS:
+        cur.execute(statement)
+        print(f"Applied: {' '.join(statement.split())[:80]}")
+
+    cur.close()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_database()
+    print("Database migration complete.")
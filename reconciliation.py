@@ -0,0 +1,116 @@
+"""Per-dataset cache reconciliation using hashed id buckets.
+
+Every node and connection is placed in one of N buckets by a hash of its id
+and gets a 32-bit fingerprint of its content. A bucket summary is
+(row count, sum of fingerprints mod 2^32), so the client can build it from
+its cache without the server having to remember anything. Buckets whose
+summaries match are skipped. For the rest, the client sends (id, fingerprint)
+pairs and the server returns the exact missing, changed and deleted ids,
+whose current rows the client then fetches with fetch_rows.
+
+Both sides use the first 4 bytes of SHA-256, read big-endian, as a 32-bit
+hash. Canonical row strings are:
+    node:       id|name|type|sex|x|y|z
+    connection: id|from_node_id|to_node_id|type
+Coordinates are written as the integer floor(c * 1000 + 0.5), computed in
+IEEE double arithmetic on both sides, so they always format identically.
+"""
+from database import register_query_shape
+
+MAX_BUCKETS = 65536
+
+def _millis(column):
+    return f"floor({column} * 1000::float8 + 0.5::float8)::bigint"
+
+def _hash32(expression):
+    return f"('x' || left(encode(sha256(convert_to({expression}, 'UTF8')), 'hex'), 8))::bit(32)::bigint"
+
+_CANONICAL_ROWS = {
+    'nodes': ('Nodes', "id || '|' || name || '|' || type || '|' || sex || '|' || "
+                       f"{_millis('x')} || '|' || {_millis('y')} || '|' || {_millis('z')}"),
+    'connections': ('Connections', "id::text || '|' || from_node_id || '|' || to_node_id || '|' || type"),
+}
+
+for _kind, (_table, _canonical) in _CANONICAL_ROWS.items():
+    _fingerprints = f"""
+        SELECT id::text AS id, {_hash32('id::text')} %% %s AS bucket, {_hash32(_canonical)} AS fingerprint
+        FROM {_table} WHERE dataset_id = %s
+    """
+    register_query_shape(f"{_kind}_bucket_summaries", f"""
+        WITH fingerprints AS ({_fingerprints})
+        SELECT bucket, COUNT(*) AS count, (SUM(fingerprint) %% 4294967296)::bigint AS digest
+        FROM fingerprints GROUP BY bucket
+    """)
+    register_query_shape(f"{_kind}_bucket_fingerprints", f"""
+        WITH fingerprints AS ({_fingerprints})
+        SELECT id, bucket, fingerprint FROM fingerprints WHERE bucket = ANY(%s)
+    """)
+
+register_query_shape('nodes_by_ids', "SELECT * FROM Nodes WHERE dataset_id = %s AND id = ANY(%s)")
+register_query_shape('connections_by_ids', "SELECT * FROM Connections WHERE dataset_id = %s AND id = ANY(%s)")
+
+
+def reconcile_kind(db, dataset_id, kind, buckets, client):
+    """Diff one kind ('nodes' or 'connections') of a dataset against a client's summaries."""
+    client_summary = {int(bucket): tuple(value) for bucket, value in client.get('summary', {}).items()}
+    client_detail = {int(bucket): rows for bucket, rows in client.get('detail', {}).items()}
+
+    server_summary = {
+        row['bucket']: (row['count'], row['digest'])
+        for row in db.execute_named(f"{kind}_bucket_summaries", (buckets, dataset_id)) or []
+    }
+
+    mismatched = sorted(
+        bucket for bucket in set(server_summary) | set(client_summary)
+        if server_summary.get(bucket) != client_summary.get(bucket)
+    )
+
+    # The client holds nothing in a bucket it did not summarize, so those need no detail
+    resolvable = [bucket for bucket in mismatched if bucket in client_detail or bucket not in client_summary]
+    unresolved = [bucket for bucket in mismatched if bucket not in resolvable]
+
+    missing, changed, deleted = [], [], []
+    if resolvable:
+        server_rows = {
+            row['id']: row['fingerprint']
+            for row in db.execute_named(f"{kind}_bucket_fingerprints", (buckets, dataset_id, resolvable)) or []
+        }
+        client_rows = {
+            str(row_id): fingerprint
+            for bucket in resolvable
+            for row_id, fingerprint in client_detail.get(bucket, [])
+        }
+        for row_id, fingerprint in server_rows.items():
+            if row_id not in client_rows:
+                missing.append(row_id)
+            elif client_rows[row_id] != fingerprint:
+                changed.append(row_id)
+        deleted = [row_id for row_id in client_rows if row_id not in server_rows]
+
+    return {
+        'mismatched_buckets': unresolved,
+        'missing': missing,
+        'changed': changed,
+        'deleted': deleted
+    }
+
+
+def reconcile(db, dataset_id, payload):
+    buckets = int(payload.get('buckets', 256))
+    if not 1 <= buckets <= MAX_BUCKETS:
+        raise ValueError(f"buckets must be between 1 and {MAX_BUCKETS}")
+
+    return {
+        'buckets': buckets,
+        **{kind: reconcile_kind(db, dataset_id, kind, buckets, payload.get(kind, {})) for kind in _CANONICAL_ROWS}
+    }
+
+
+def fetch_rows(db, dataset_id, payload):
+    """Return the dataset's nodes and connections with the given ids."""
+    node_ids = [str(node_id) for node_id in payload.get('node_ids', [])]
+    connection_ids = [int(connection_id) for connection_id in payload.get('connection_ids', [])]
+    return {
+        'nodes': db.execute_named('nodes_by_ids', (dataset_id, node_ids)) if node_ids else [],
+        'connections': db.execute_named('connections_by_ids', (dataset_id, connection_ids)) if connection_ids else []
+    }
@@ -68,10 +68,17 @@ def reset_database():
         z FLOAT NOT NULL,
         url VARCHAR(255),
         sex CHAR(1) NOT NULL DEFAULT 'U',
+        birth_year INTEGER,
+        death_year INTEGER,
+        generation INTEGER,
         PRIMARY KEY (id, dataset_id)
     )
     """)
 
+    cur.execute("""
+    CREATE INDEX idx_nodes_dataset_birth_year ON Nodes (dataset_id, birth_year)
+    """)
+
     cur.execute("""
     CREATE TABLE Connections (
         id SERIAL PRIMARY KEY,
@@ -84,7 +91,33 @@ def reset_database():
     )
     """)
 
-    print("Created Datasets, Nodes, and Connections tables with updated schema.")
+    # Lets GEDCOM re-imports diff connections per dataset without a full scan
+    cur.execute("""
+    CREATE INDEX idx_connections_dataset_edge ON Connections (dataset_id, from_node_id, to_node_id)
+    """)
+
+    # Lets lookups by either end of a connection use an index (BitmapOr)
+    cur.execute("""
+    CREATE INDEX idx_connections_dataset_to ON Connections (dataset_id, to_node_id)
+    """)
+
+    # Materialized ancestor/descendant pairs for genealogy datasets, one row per
+    # pair with the shortest generation distance (depth 0 is the person itself)
+    cur.execute("""
+    CREATE TABLE Ancestry (
+        dataset_id INTEGER REFERENCES Datasets(id),
+        ancestor_id VARCHAR(255) NOT NULL,
+        descendant_id VARCHAR(255) NOT NULL,
+        depth INTEGER NOT NULL,
+        PRIMARY KEY (dataset_id, ancestor_id, descendant_id)
+    )
+    """)
+
+    cur.execute("""
+    CREATE INDEX idx_ancestry_descendant ON Ancestry (dataset_id, descendant_id, ancestor_id, depth)
+    """)
+
+    print("Created Datasets, Nodes, Connections and Ancestry tables with updated schema.")
 
     # Create a default dataset
     cur.execute("INSERT INTO Datasets (name) VALUES ('Default Dataset') RETURNING id")
@@ -1,6 +1,7 @@
 export let MAX_CONNECTIONS = 1000;
 export let MAX_NODES = 1000;
 export let RENDER_DISTANCE = Infinity;
+export const PREVIEW_SAMPLE_SIZE = 2000;
 
 export function setMaxConnections(value) {
     MAX_CONNECTIONS = value;
@@ -1,6 +1,8 @@
-import { nodes } from './nodeManager.js';
-import { lines } from './connectionManager.js';
+import { nodes, addNode } from './nodeManager.js';
+import { lines, addConnection, deleteConnection, updateNodeConnections } from './connectionManager.js';
 import { getCurrentDatasetId } from './dataLoader.js';
+import { updateVisibleElements } from './utils.js';
+import { scene } from './core.js';
 
 export function initDataSync() {
     // Set up periodic sync
@@ -66,3 +68,137 @@ export function triggerSync() {
         syncDataWithServer();
     }, 1000);  // Delay sync by 1 second to batch rapid changes
 }
+
+// Cache reconciliation, see reconciliation.py for the hashing scheme
+const encoder = new TextEncoder();
+
+async function hash32(text) {
+    const digest = await crypto.subtle.digest('SHA-256', encoder.encode(text));
+    return new DataView(digest).getUint32(0);
+}
+
+function formatCoordinate(value) {
+    // Same integer as the server's floor(c * 1000 + 0.5); `|| 0` turns -0 into 0
+    return Math.floor(Number(value || 0) * 1000 + 0.5) || 0;
+}
+
+function nodeCanonical(node) {
+    return `${node.id}|${node.name}|${node.type}|${node.sex || 'U'}|${formatCoordinate(node.x)}|${formatCoordinate(node.y)}|${formatCoordinate(node.z)}`;
+}
+
+function connectionCanonical(connection) {
+    return `${connection.id}|${connection.from_node_id}|${connection.to_node_id}|${connection.type}`;
+}
+
+async function summarize(rows, canonical, buckets) {
+    const hashed = await Promise.all(rows.map(async row => {
+        const id = String(row.id);
+        return [id, (await hash32(id)) % buckets, await hash32(canonical(row))];
+    }));
+
+    const summary = {};
+    const detail = {};
+    hashed.forEach(([id, bucket, fingerprint]) => {
+        const [count, digest] = summary[bucket] || [0, 0];
+        summary[bucket] = [count + 1, (digest + fingerprint) % 4294967296];
+        (detail[bucket] = detail[bucket] || []).push([id, fingerprint]);
+    });
+    return { summary, detail };
+}
+
+function postReconcile(datasetId, body) {
+    return fetch(`/api/dataset/${datasetId}/reconcile`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body)
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    });
+}
+
+function fetchRows(datasetId, nodeIds, connectionIds) {
+    return fetch(`/api/dataset/${datasetId}/rows`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ node_ids: nodeIds, connection_ids: connectionIds })
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    });
+}
+
+function mergeNode(row) {
+    if (nodes[row.id]) {
+        scene.remove(nodes[row.id]);
+    }
+    const sphere = addNode(row, false);
+    updateNodeConnections(row.id, sphere.position);
+}
+
+function mergeConnection(row) {
+    deleteConnection(row.id);
+    addConnection(row, false);
+}
+
+export async function reconcileDataset(datasetId = getCurrentDatasetId(), buckets = 256) {
+    if (!datasetId) {
+        console.log("No dataset selected. Skipping reconciliation.");
+        return null;
+    }
+
+    const local = {
+        nodes: await summarize(Object.values(nodes).map(node => node.userData), nodeCanonical, buckets),
+        connections: await summarize(Object.values(lines).map(line => line.userData), connectionCanonical, buckets)
+    };
+
+    let result = await postReconcile(datasetId, {
+        buckets,
+        nodes: { summary: local.nodes.summary },
+        connections: { summary: local.connections.summary }
+    });
+
+    // Second round: send (id, fingerprint) pairs only for the buckets that differ
+    if (result.nodes.mismatched_buckets.length || result.connections.mismatched_buckets.length) {
+        const withDetail = kind => ({
+            summary: local[kind].summary,
+            detail: Object.fromEntries(result[kind].mismatched_buckets.map(bucket => [bucket, local[kind].detail[bucket] || []]))
+        });
+        result = await postReconcile(datasetId, {
+            buckets,
+            nodes: withDetail('nodes'),
+            connections: withDetail('connections')
+        });
+    }
+
+    result.connections.deleted.forEach(id => deleteConnection(id));
+    result.nodes.deleted.forEach(id => {
+        if (nodes[id]) {
+            scene.remove(nodes[id]);
+            delete nodes[id];
+        }
+    });
+
+    // Fetch the current rows for everything the server has that the cache lacks or holds stale
+    const nodeIds = [...result.nodes.missing, ...result.nodes.changed];
+    const connectionIds = [...result.connections.missing, ...result.connections.changed];
+    if (nodeIds.length || connectionIds.length) {
+        const rows = await fetchRows(datasetId, nodeIds, connectionIds);
+        rows.nodes.forEach(mergeNode);
+        rows.connections.forEach(mergeConnection);
+        updateVisibleElements();
+    }
+
+    console.log('Reconciliation result:', result);
+    return result;
+}
@@ -4,8 +4,12 @@ import { lines, loadedConnections, addConnection } from './connectionManager.js'
 import { updateVisibleElements } from './utils.js';
 import { focusOnAllNodes } from './cameraControls.js';
 import { getCurrentMode } from './modeManager.js';
+import { PREVIEW_SAMPLE_SIZE } from './config.js';
+import { reconcileDataset } from './dataSync.js';
 
 let currentDatasetId = null;
+// Dataset whose full data is in memory, so a reload only needs to reconcile
+let loadedDatasetId = null;
 
 export function initDatasetManager() {
     const datasetSelector = document.getElementById('datasetSelector');
@@ -23,6 +27,13 @@ export function initDatasetManager() {
     } else {
         console.warn("Dataset selector element not found");
     }
+
+    // Catch up on changes made while the connection was down
+    window.addEventListener('online', () => {
+        if (loadedDatasetId) {
+            loadDataset(loadedDatasetId);
+        }
+    });
 }
 
 function handleDatasetChange(event) {
@@ -38,10 +49,43 @@ export function loadDataset(datasetId) {
     if (!datasetId) return;
 
     currentDatasetId = datasetId;
+    let fullDataLoaded = false;
+    const mode = getCurrentMode();
+    const isGenealogy = mode && mode.name === 'Genealogy';
+
+    // The dataset is already loaded: fetch only what changed on the server.
+    // Genealogy positions come from the layout, not the server, so that mode reloads.
+    if (String(datasetId) === loadedDatasetId && !isGenealogy) {
+        reconcileDataset(datasetId)
+            .catch(error => {
+                console.warn('Reconciliation failed, reloading dataset:', error);
+                loadedDatasetId = null;
+                loadDataset(datasetId);
+            });
+        return;
+    }
+
+    // Show a small spatially stratified sample while the full dataset downloads.
+    // Genealogy layout needs the whole tree, so that mode waits for the full data.
+    if (!isGenealogy) {
+        fetch(`/api/dataset/${datasetId}/sample?n=${PREVIEW_SAMPLE_SIZE}`)
+            .then(response => response.ok ? response.json() : null)
+            .then(sample => {
+                if (!sample || fullDataLoaded || currentDatasetId !== datasetId) return;
+                clearExistingData();
+                loadNodesFromData(sample.nodes);
+                loadConnectionsFromData(sample.connections);
+                updateVisibleElements();
+                focusOnAllNodes();
+            })
+            .catch(error => console.warn('Preview sample unavailable:', error));
+    }
 
     fetch(`/api/dataset/${datasetId}`)
         .then(response => response.json())
         .then(data => {
+            if (currentDatasetId !== datasetId) return;
+            fullDataLoaded = true;
             clearExistingData();
             console.log("Raw data from server:", data);
 
@@ -59,6 +103,7 @@ export function loadDataset(datasetId) {
                 loadConnectionsFromData(data.connections);
             }
 
+            loadedDatasetId = String(datasetId);
             updateVisibleElements();
             focusOnAllNodes();
             
@@ -106,6 +151,8 @@ export async function fetchDatasets() {
 }
 
 export async function clearExistingData() {
+    loadedDatasetId = null;
+
     // Clear nodes
     Object.values(nodes).forEach(node => {
         scene.remove(node);
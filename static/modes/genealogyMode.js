@@ -54,6 +54,8 @@ export const genealogyMode = {
             this.uploadForm.innerHTML = `
                 <input type="file" id="gedFile" name="file" accept=".ged" style="display: none;">
                 <button type="button" id="uploadButton">Upload GED File</button>
+                <input type="file" id="gedReimportFile" name="file" accept=".ged" style="display: none;">
+                <button type="button" id="reimportButton">Re-import into Current Dataset</button>
             `;
             document.getElementById('controls').appendChild(this.uploadForm);
             
@@ -62,6 +64,12 @@ export const genealogyMode = {
             });
             
             document.getElementById('gedFile').addEventListener('change', this.handleFileUpload.bind(this));
+
+            document.getElementById('reimportButton').addEventListener('click', () => {
+                document.getElementById('gedReimportFile').click();
+            });
+
+            document.getElementById('gedReimportFile').addEventListener('change', this.handleFileReimport.bind(this));
         }
     },
     removeUploadForm: function() {
@@ -108,6 +116,45 @@ export const genealogyMode = {
             console.error('Error:', error);
         });
     },
+    handleFileReimport: function(e) {
+        const file = e.target.files[0];
+        if (!file) {
+            console.error('No file selected');
+            return;
+        }
+
+        const datasetSelector = document.getElementById('datasetSelector');
+        const datasetId = datasetSelector.value;
+        if (!datasetId) {
+            console.error('No dataset selected for re-import');
+            return;
+        }
+
+        const formData = new FormData();
+        formData.append('file', file);
+
+        fetch(`/api/dataset/${datasetId}/reimport_ged`, {
+            method: 'POST',
+            body: formData
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                console.error('Error re-importing GED file:', data.error);
+                return;
+            }
+            console.log('GED file re-imported:', data.changes);
+
+            // Reload the dataset so the viewer picks up the diff
+            datasetSelector.dispatchEvent(new Event('change'));
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        })
+        .finally(() => {
+            e.target.value = '';
+        });
+    },
     loadDataset: function(datasetId, nodes, connections) {
         console.log(`Loading dataset ${datasetId} with ${nodes.length} nodes and ${connections.length} connections`);
         
@@ -194,7 +241,7 @@ export const genealogyMode = {
         // Position nodes based on birth year on Z-axis
         function positionNodes(nodeMap) {
             nodeMap.forEach(node => {
-                node.z = (node.birthYear || 0) * YEAR_SPACING; // Birth year -> Z-axis
+                node.z = (node.birthYear || node.birth_year || 0) * YEAR_SPACING; // Birth year -> Z-axis
             });
         }
 
@@ -461,25 +461,9 @@ async function loadDataFromFile(event) {
                 // Add the dataset name to the data object
                 data.name = datasetName;
 
-                // Fetch existing connection IDs
-                let existingIds = [];
-                try {
-                    const existingIdsResponse = await fetch('/api/connection_ids');
-                    if (!existingIdsResponse.ok) {
-                        throw new Error(`Failed to fetch existing connection IDs: ${existingIdsResponse.statusText}`);
-                    }
-                    existingIds = await existingIdsResponse.json();
-                } catch (error) {
-                    console.warn("Failed to fetch existing connection IDs. Proceeding with import anyway.", error);
-                }
-
-                // Generate new unique IDs for connections
+                // Let the server assign connection IDs so they cannot collide with other datasets
                 if (data.connections) {
-                    let maxId = Math.max(...existingIds, ...data.connections.map(c => parseInt(c.id) || 0), 0);
-                    data.connections = data.connections.map(connection => ({
-                        ...connection,
-                        id: ++maxId
-                    }));
+                    data.connections = data.connections.map(({ id, ...connection }) => connection);
                 }
                 
                 // Send data to server to create a new dataset